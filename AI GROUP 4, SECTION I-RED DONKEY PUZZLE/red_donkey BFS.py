@@ -1,8 +1,11 @@
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.animation import FuncAnimation
+import os
 from collections import deque
-import copy
+from red_donkey_table import load_table
+from red_donkey_bitboard import (ROWS, COLS, canonical, cell_mask, from_blocks, moves,
+                                 rebuild_path, to_blocks)
 
 # Initial block positions
 blocks_init = [
@@ -15,78 +18,51 @@ blocks_init = [
     (4, 3, 2, 1, 1),  # small bottom-right
 ]
 
-ROWS, COLS = 5, 4
 GOAL_POS = (3, 1) 
+GOAL_MASK = cell_mask(*GOAL_POS, 2, 2)
+# Distances from every reachable position, built on the first run.
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blocks_init.table')
 
-def encode_state(blocks):
-    """Encode blocks positions as a tuple for BFS visited set"""
-    return tuple(sorted((b[0], b[1], b[2]) for b in blocks))
-
-def is_goal(blocks):
+def is_goal(pieces, masks):
     """Check if red 2x2 block reached goal"""
-    for b in blocks:
-        if b[0] == 1:  # red block
-            return (b[1], b[2]) == GOAL_POS
+    for (id, _, _), mask in zip(pieces, masks):
+        if id == 1:  # red block
+            return mask == GOAL_MASK
     return False
 
-def build_grid(blocks):
-    """Create 2D grid from blocks"""
-    grid = [[0]*COLS for _ in range(ROWS)]
-    for b in blocks:
-        id, r, c, h, w = b
-        for i in range(h):
-            for j in range(w):
-                grid[r+i][c+j] = id
-    return grid
-
-def move_block(block, dr, dc, blocks):
-    """Move a block if possible, return new blocks list or None"""
-    id, r, c, h, w = block
-    # check bounds
-    if r+dr < 0 or r+dr+h > ROWS or c+dc < 0 or c+dc+w > COLS:
-        return None
-    # build grid
-    grid = build_grid(blocks)
-    # check collision
-    for i in range(h):
-        for j in range(w):
-            nr, nc = r+i+dr, c+j+dc
-            if grid[nr][nc] != 0 and grid[nr][nc] != id:
-                return None
-    # move block
-    new_blocks = []
-    for b in blocks:
-        if b == block:
-            new_blocks.append((id, r+dr, c+dc, h, w))
-        else:
-            new_blocks.append(b)
-    return new_blocks
-
 # BFS Solver
 
-def bfs(blocks_init):
-    visited = set()
-    queue = deque([(blocks_init, [])])
+def bfs(blocks_init, mirror=True):
+    """Shortest solution as a list of block lists.
+
+    Positions that differ only by swapping same-shape pieces, or by a
+    left-right mirror (the goal column is symmetric), are visited once.
+    Each visited key maps to (parent_key, piece, direction), and the
+    boards are rebuilt from those records only once the goal is found,
+    so they keep the real pieces for the animation.
+    """
+    pieces, start = from_blocks(blocks_init)
+    start_key = canonical(start, mirror)
+    parents = {start_key: None}
+    queue = deque([(start, start_key)])
     while queue:
-        blocks, path = queue.popleft()
-        state = encode_state(blocks)
-        if state in visited:
-            continue
-        visited.add(state)
-
-        if is_goal(blocks):
-            return path + [blocks]
-
-        for b in blocks:
-            for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                new_blocks = move_block(b, dr, dc, blocks)
-                if new_blocks:
-                    queue.append((new_blocks, path + [blocks]))
+        masks, key = queue.popleft()
+        if is_goal(pieces, masks):
+            return [to_blocks(pieces, m) for m in rebuild_path(parents, start, key)]
+
+        for i, d, new_masks in moves(masks):
+            new_key = canonical(new_masks, mirror)
+            if new_key not in parents:
+                parents[new_key] = (key, i, d)
+                queue.append((new_masks, new_key))
     return None
 
-# Solve
+# Solve: look the solution up in the distance table instead of searching
 print("Solving Red Donkey puzzle...")
-solution = bfs(blocks_init)
+pieces, start = from_blocks(blocks_init)
+table = load_table(TABLE_PATH, start, GOAL_MASK)
+path = table.solve(start)
+solution = path and [to_blocks(pieces, m) for m in path]
 if solution:
     print(f"Solution found in {len(solution)-1} moves!")
 else:
@@ -1,8 +1,12 @@
+import heapq
+from collections import deque
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from red_donkey_bitboard import (ROWS, COLS, canonical, cell_mask, from_board, moves,
+                                 rebuild_path, to_board, top_left)
 
-ROWS, COLS = 5, 4
 GOAL_TOP_LEFT = (3, 1)
+GOAL_MASK = cell_mask(*GOAL_TOP_LEFT, 2, 2)
 
 START = (
     (2, 1, 1, 3),
@@ -13,74 +17,140 @@ START = (
 )
 
 
-def find_blocks(board):
-    blocks = {}
-    for r in range(ROWS):
-        for c in range(COLS):
-            v = board[r][c]
-            if v != 0:
-                blocks.setdefault(v, []).append((r, c))
-    return blocks
+def is_goal(pieces, masks):
+    for (bid, _, _), mask in zip(pieces, masks):
+        if bid == 1:
+            return mask == GOAL_MASK
+    return False
 
 
-def is_goal(board):
-    red = find_blocks(board)[1]
-    r0 = min(r for r, _ in red)
-    c0 = min(c for _, c in red)
-    return (r0, c0) == GOAL_TOP_LEFT
+def neighbors(masks):
+    return [new_masks for _, _, new_masks in moves(masks)]
 
 
-def can_move(board, cells, dr, dc):
-    for r, c in cells:
-        nr, nc = r + dr, c + dc
-        if not (0 <= nr < ROWS and 0 <= nc < COLS):
-            return False
-        if board[nr][nc] not in (0, board[r][c]):
-            return False
-    return True
+def dfs(start, mirror=True):
+    # Visited keys ignore which same-shape piece is where and, with mirror,
+    # left-right reflection. Each maps to (parent_key, piece, direction);
+    # the real boards are rebuilt from those records at the end.
+    pieces, first = from_board(start)
+    stack = [(first, None)]
+    parents = {}
 
+    while stack:
+        masks, record = stack.pop()
+        key = canonical(masks, mirror)
+        if key in parents:
+            continue
+        parents[key] = record
 
-def move(board, cells, dr, dc, bid):
-    new = [list(row) for row in board]
-    for r, c in cells:
-        new[r][c] = 0
-    for r, c in cells:
-        new[r+dr][c+dc] = bid
-    return tuple(tuple(row) for row in new)
+        if is_goal(pieces, masks):
+            return [to_board(pieces, m) for m in rebuild_path(parents, first, key)]
 
+        for i, d, nb in moves(masks):
+            if canonical(nb, mirror) not in parents:
+                stack.append((nb, (key, i, d)))
 
-def neighbors(board):
-    result = []
-    blocks = find_blocks(board)
-    for bid, cells in blocks.items():
-        for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-            if can_move(board, cells, dr, dc):
-                result.append(move(board, cells, dr, dc, bid))
-    return result
+    return None
 
 
-def dfs(start):
-    stack = [(start, [start])]
-    visited = set()
+def heuristic(masks, red):
+    # Admissible: the red block moves one cell per move, and every other
+    # piece inside the goal square must move at least once.
+    r, c = top_left(masks[red])
+    distance = abs(r - GOAL_TOP_LEFT[0]) + abs(c - GOAL_TOP_LEFT[1])
+    blockers = sum(1 for i, mask in enumerate(masks) if i != red and mask & GOAL_MASK)
+    return distance + blockers
 
-    while stack:
-        board, path = stack.pop()
-        if board in visited:
+
+def red_index(pieces):
+    return next(i for i, (bid, _, _) in enumerate(pieces) if bid == 1)
+
+
+def astar(start, mirror=True):
+    # Optimal: the heuristic changes by at most one per move, so the first
+    # time a position is expanded it has its shortest distance from start.
+    pieces, first = from_board(start)
+    red = red_index(pieces)
+    first_key = canonical(first, mirror)
+    # Best known g for each key and the (masks, parent_key) it was reached with.
+    best_g = {first_key: 0}
+    came_from = {first_key: (first, None)}
+    closed = set()
+    heap = [(heuristic(first, red), 0, 0, first, first_key)]
+    counter = 1
+
+    while heap:
+        _, neg_g, _, masks, key = heapq.heappop(heap)
+        if key in closed:
             continue
-        visited.add(board)
+        closed.add(key)
+
+        if is_goal(pieces, masks):
+            path = []
+            while key is not None:
+                masks, key = came_from[key]
+                path.append(to_board(pieces, masks))
+            return path[::-1]
+
+        g = 1 - neg_g  # the children's g
+        for nb in neighbors(masks):
+            nb_key = canonical(nb, mirror)
+            if nb_key not in closed and g < best_g.get(nb_key, g + 1):
+                best_g[nb_key] = g
+                came_from[nb_key] = (nb, key)
+                # Deeper nodes first on ties of f.
+                heapq.heappush(heap, (g + heuristic(nb, red), -g, counter, nb, nb_key))
+                counter += 1
+
+    return None
 
-        if is_goal(board):
-            return path
 
-        for nb in neighbors(board):
-            if nb not in visited:
-                stack.append((nb, path + [nb]))
+def fringe_search(start, mirror=True):
+    # Iterative deepening on f, like IDA*, but the nodes cut off by one f
+    # limit are kept as the fringe the next limit resumes from, so the
+    # tree above them is not searched again. Within a limit the fringe is
+    # worked through depth-first, children just after their parent.
+    pieces, first = from_board(start)
+    red = red_index(pieces)
+    first_key = canonical(first, mirror)
+    # Best known g for each key, with the masks and parent key reached by it.
+    cache = {first_key: (0, first, None)}
+    now = deque([(0, first, first_key)])
+    limit = heuristic(first, red)
+
+    while now:
+        later = deque()
+        smallest = float('inf')
+        while now:
+            g, masks, key = now.popleft()
+            if cache[key][0] != g:
+                continue  # reached again with a smaller g
+            f = g + heuristic(masks, red)
+            if f > limit:
+                smallest = min(smallest, f)
+                later.append((g, masks, key))
+                continue
+
+            if is_goal(pieces, masks):
+                path = []
+                while key is not None:
+                    _, masks, key = cache[key]
+                    path.append(to_board(pieces, masks))
+                return path[::-1]
+
+            for nb in reversed(neighbors(masks)):
+                nb_key = canonical(nb, mirror)
+                if nb_key in cache and cache[nb_key][0] <= g + 1:
+                    continue
+                cache[nb_key] = (g + 1, nb, key)
+                now.appendleft((g + 1, nb, nb_key))
+        now, limit = later, smallest
 
     return None
 
 
-print("Solving with DFS...")
-solution = dfs(START)
+print("Solving with A*...")
+solution = astar(START)
 print("Moves:", len(solution) - 1)
 
 
@@ -117,7 +187,7 @@ def draw(board):
 
 def animate(i):
     draw(solution[i])
-    ax.set_title(f"DFS Solution – Move {i}/{len(solution)-1}")
+    ax.set_title(f"A* Solution – Move {i}/{len(solution)-1}")
 
 FuncAnimation(fig, animate, frames=len(solution), interval=300, repeat=False)
 plt.show()
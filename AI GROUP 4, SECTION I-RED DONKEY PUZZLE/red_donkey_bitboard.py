@@ -0,0 +1,159 @@
+"""Bitboard representation shared by the Red Donkey solvers.
+
+Cell (r, c) of the 5x4 board is bit r*COLS + c. A position is a tuple
+with one mask per piece, in a fixed piece order; the board's occupancy
+is the OR of the masks. Every piece shape, position and direction has a
+precomputed pair of masks: the cells that must be empty for the slide,
+and the XOR that moves the piece. A move is then one AND test and one XOR.
+"""
+
+ROWS, COLS = 5, 4
+CELLS = ROWS * COLS
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+SHAPES = [(1, 1), (1, 2), (2, 1), (2, 2)]
+
+
+def cell_mask(r, c, h, w):
+    """Mask of an h x w piece whose top-left cell is (r, c)"""
+    mask = 0
+    for i in range(h):
+        for j in range(w):
+            mask |= 1 << ((r + i) * COLS + c + j)
+    return mask
+
+
+def top_left(mask):
+    """Top-left (row, col) of a piece mask"""
+    cell = (mask & -mask).bit_length() - 1
+    return divmod(cell, COLS)
+
+
+def _build_slides():
+    # Keyed by mask alone: a mask fixes both the shape and the position.
+    slides, shape_index = {}, {}
+    for k, (h, w) in enumerate(SHAPES):
+        for r in range(ROWS - h + 1):
+            for c in range(COLS - w + 1):
+                mask = cell_mask(r, c, h, w)
+                moves = []
+                for d, (dr, dc) in enumerate(DIRECTIONS):
+                    if 0 <= r + dr <= ROWS - h and 0 <= c + dc <= COLS - w:
+                        moved = cell_mask(r + dr, c + dc, h, w)
+                        moves.append((moved & ~mask, mask ^ moved, d))
+                slides[mask] = tuple(moves)
+                shape_index[mask] = k
+    return slides, shape_index
+
+
+# SLIDES[mask] lists (must_be_empty, xor, direction) for each slide on the
+# board, direction being an index into DIRECTIONS,
+# and SHAPE_INDEX[mask] is the piece's index in SHAPES.
+SLIDES, SHAPE_INDEX = _build_slides()
+
+# Each byte of a canonical key holds two 4-cell rows; this reverses both.
+_MIRROR_BYTES = bytes(
+    sum(((b >> (4 * half + i)) & 1) << (4 * half + 3 - i) for half in (0, 1) for i in range(4))
+    for b in range(256))
+KEY_BYTES = (len(SHAPES) * CELLS + 7) // 8
+
+
+def occupancy(masks):
+    """Mask of all occupied cells"""
+    occupied = 0
+    for mask in masks:
+        occupied |= mask
+    return occupied
+
+
+def moves(masks):
+    """Yield (piece_index, direction, new_masks) for every legal one-cell slide"""
+    occupied = occupancy(masks)
+    for i, mask in enumerate(masks):
+        for need, xor, d in SLIDES[mask]:
+            if not occupied & need:
+                yield i, d, masks[:i] + (mask ^ xor,) + masks[i+1:]
+
+
+def slide(masks, i, d):
+    """Return masks after piece i slides in direction d, which must be legal"""
+    for _, xor, direction in SLIDES[masks[i]]:
+        if direction == d:
+            return masks[:i] + (masks[i] ^ xor,) + masks[i+1:]
+    raise ValueError("piece cannot slide off the board")
+
+
+def rebuild_path(parents, start, key):
+    """Replay the (parent_key, piece, direction) records from start to key.
+
+    parents maps every visited key to its record, and the start's key to
+    None. Returns the list of masks from start to the position at key.
+    """
+    records = []
+    while parents[key] is not None:
+        key, i, d = parents[key]
+        records.append((i, d))
+    path = [start]
+    for i, d in reversed(records):
+        path.append(slide(path[-1], i, d))
+    return path
+
+
+def canonical(masks, mirror=False):
+    """Visited-set key that labels cells by piece shape, not piece id.
+
+    The key stacks one occupancy mask per shape, so swapping two pieces of
+    the same shape gives the same key. Tiling a region with one rectangle
+    shape can be done only one way, so the key still fixes every piece.
+    With mirror, a position and its left-right mirror image share a key;
+    only use it when the goal is its own mirror image.
+    """
+    layers = [0] * len(SHAPES)
+    for mask in masks:
+        layers[SHAPE_INDEX[mask]] |= mask
+    key = 0
+    for layer in layers:
+        key = key << CELLS | layer
+    if mirror:
+        data = key.to_bytes(KEY_BYTES, 'little').translate(_MIRROR_BYTES)
+        key = min(key, int.from_bytes(data, 'little'))
+    return key
+
+
+def from_blocks(blocks):
+    """Convert (id, r, c, h, w) blocks to (pieces, masks); pieces are (id, h, w)"""
+    pieces = tuple((id, h, w) for id, _, _, h, w in blocks)
+    masks = tuple(cell_mask(r, c, h, w) for _, r, c, h, w in blocks)
+    return pieces, masks
+
+
+def to_blocks(pieces, masks):
+    """Convert (pieces, masks) back to a list of (id, r, c, h, w) blocks"""
+    return [(id, *top_left(mask), h, w) for (id, h, w), mask in zip(pieces, masks)]
+
+
+def from_board(board):
+    """Convert a grid of piece ids (0 is empty) to (pieces, masks), ordered by id"""
+    cells = {}
+    for r in range(ROWS):
+        for c in range(COLS):
+            if board[r][c] != 0:
+                cells.setdefault(board[r][c], []).append((r, c))
+    pieces, masks = [], []
+    for id in sorted(cells):
+        rows = [r for r, _ in cells[id]]
+        cols = [c for _, c in cells[id]]
+        h, w = max(rows) - min(rows) + 1, max(cols) - min(cols) + 1
+        pieces.append((id, h, w))
+        masks.append(cell_mask(min(rows), min(cols), h, w))
+    return tuple(pieces), tuple(masks)
+
+
+def to_board(pieces, masks):
+    """Convert (pieces, masks) back to a grid of piece ids"""
+    board = [[0] * COLS for _ in range(ROWS)]
+    for (id, _, _), mask in zip(pieces, masks):
+        while mask:
+            r, c = top_left(mask)
+            board[r][c] = id
+            mask &= mask - 1
+    return tuple(tuple(row) for row in board)
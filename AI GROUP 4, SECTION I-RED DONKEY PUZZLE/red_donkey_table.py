@@ -0,0 +1,155 @@
+"""Exact distance-to-goal table for every position reachable from a layout.
+
+The whole connected state space is enumerated once and every position's
+distance to the nearest goal (red block's top-left at GOAL_TOP_LEFT) is
+found by a breadth-first search backwards from all goal positions. The
+table is keyed by canonical position, so it answers for any piece
+identities, and is stored as a small file that is loaded on startup.
+After that, a position's optimal next move and full solution are dict
+lookups.
+"""
+
+import argparse
+import json
+import os
+import struct
+from collections import deque
+
+from red_donkey_bitboard import KEY_BYTES, canonical, cell_mask, from_board, moves
+
+GOAL_TOP_LEFT = (3, 1)
+GOAL_MASK = cell_mask(*GOAL_TOP_LEFT, 2, 2)
+
+# The classic layout, as in red_donkey DFS.py.
+START = (
+    (2, 1, 1, 3),
+    (2, 1, 1, 3),
+    (4, 6, 7, 5),
+    (4, 8, 9, 5),
+    (0, 10, 11, 0),
+)
+
+MAGIC = b'RDT1'
+# Magic, mirror flag and the number of positions; the canonical keys and
+# then one distance byte per position follow.
+HEADER = struct.Struct('<4s?3xI')
+
+
+def build_table(start, goal_mask=GOAL_MASK, mirror=True):
+    """Map the canonical key of every position connected to start to its distance.
+
+    Positions that cannot reach a goal are left out. Only fold mirror
+    images when the goal is its own mirror image, as GOAL_MASK is.
+    """
+    positions = {canonical(start, mirror): start}
+    queue = deque([start])
+    while queue:
+        for _, _, new_masks in moves(queue.popleft()):
+            key = canonical(new_masks, mirror)
+            if key not in positions:
+                positions[key] = new_masks
+                queue.append(new_masks)
+    # Moves are reversible, so distances to the goal come from one
+    # breadth-first search started from every goal position at once.
+    distances = {key: 0 for key, masks in positions.items() if goal_mask in masks}
+    queue = deque(distances)
+    while queue:
+        key = queue.popleft()
+        for _, _, new_masks in moves(positions[key]):
+            new_key = canonical(new_masks, mirror)
+            if new_key not in distances:
+                distances[new_key] = distances[key] + 1
+                queue.append(new_key)
+    return distances
+
+
+def write_table(path, distances, mirror=True):
+    """Write a table as a header, the canonical keys and one distance byte each"""
+    if distances and max(distances.values()) > 255:
+        raise ValueError("distances above 255 do not fit the table format")
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, mirror, len(distances)))
+        for key in distances:
+            f.write(key.to_bytes(KEY_BYTES, 'little'))
+        f.write(bytes(distances.values()))
+    os.replace(path + '.tmp', path)
+
+
+class DistanceTable:
+    """Loaded distance table answering hint and solution queries.
+
+    Positions are (masks) tuples as in red_donkey_bitboard; positions
+    outside the enumerated state space give None.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, self.mirror, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Red Donkey distance table")
+        keys_end = HEADER.size + KEY_BYTES * count
+        keys = (int.from_bytes(data[i:i + KEY_BYTES], 'little')
+                for i in range(HEADER.size, keys_end, KEY_BYTES))
+        self.distances = dict(zip(keys, data[keys_end:keys_end + count]))
+
+    def __len__(self):
+        return len(self.distances)
+
+    def distance(self, masks):
+        """Optimal number of moves left, or None if unknown"""
+        return self.distances.get(canonical(masks, self.mirror))
+
+    def next_move(self, masks):
+        """Return (piece_index, direction, new_masks) of an optimal move.
+
+        Returns None at a goal or for a position not in the table.
+        """
+        distance = self.distance(masks)
+        if not distance:
+            return None
+        for i, d, new_masks in moves(masks):
+            if self.distance(new_masks) == distance - 1:
+                return i, d, new_masks
+        raise ValueError("table is inconsistent with the move generator")
+
+    def solve(self, masks):
+        """Optimal list of masks from masks to a goal, or None if unknown"""
+        if self.distance(masks) is None:
+            return None
+        path = [masks]
+        while (step := self.next_move(path[-1])) is not None:
+            path.append(step[2])
+        return path
+
+
+def load_table(path, start, goal_mask=GOAL_MASK, mirror=True):
+    """Load the table at path, building and writing it first if it is missing
+    or does not cover start."""
+    if os.path.exists(path):
+        table = DistanceTable(path)
+        if table.mirror == mirror and table.distance(start) is not None:
+            return table
+    write_table(path, build_table(start, goal_mask, mirror), mirror)
+    return DistanceTable(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Red Donkey distance table.")
+    parser.add_argument('path', help="output file")
+    parser.add_argument('--board', default=None,
+                        help="JSON grid of piece ids (0 is empty); the classic START if omitted")
+    parser.add_argument('--no-mirror', action='store_true',
+                        help="keep left-right mirror images apart")
+    args = parser.parse_args()
+    board = json.loads(args.board) if args.board else START
+    _, start = from_board(board)
+    mirror = not args.no_mirror
+    distances = build_table(start, mirror=mirror)
+    write_table(args.path, distances, mirror)
+    print(f"Wrote {len(distances)} positions to {args.path}; "
+          f"the layout needs {distances.get(canonical(start, mirror))} moves")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+from fifteenpuzzle import (board_size, get_heuristic, get_move_automaton, is_solvable,
+                           solve_anytime, solve_astar, solve_bidirectional, solve_dfs,
+                           solve_idastar, solve_sma)
+
+SOLVERS = {
+    'astar': solve_astar,
+    'idastar': solve_idastar,
+    'dfs': solve_dfs,
+    'bidirectional': solve_bidirectional,
+    'anytime': solve_anytime,
+    'sma': solve_sma,
+}
+
+# Per-process solver settings, filled in by ``_init_worker``.
+_worker = {}
+
+# Solvers that can finish through a perimeter database.
+PERIMETER_SOLVERS = ('astar', 'idastar', 'dfs')
+# Solvers that take a cap on the nodes held in memory.
+BOUNDED_SOLVERS = ('astar', 'sma')
+# Solvers that search with a heuristic; ``dfs`` is uninformed.
+HEURISTIC_SOLVERS = ('astar', 'idastar', 'bidirectional', 'anytime', 'sma')
+
+def _init_worker(solver, heuristic, pdb_dir, partition, cache_path=None, perimeter_path=None,
+                 max_nodes=None):
+    # Build heuristic tables and the move automaton here so the first solve
+    # is not charged for them.
+    get_move_automaton()
+    if pdb_dir is not None:
+        from pattern_database import AdditivePatternDatabase
+        heuristic = AdditivePatternDatabase(pdb_dir, partition)
+    elif heuristic is not None:
+        heuristic = get_heuristic(heuristic)
+    _worker['solver'] = SOLVERS.get(solver, solver)
+    _worker['heuristic'] = heuristic
+    _worker['heuristics'] = {} if heuristic is None else {heuristic.size: heuristic}
+    _worker['cache'] = None
+    if cache_path is not None:
+        from solution_cache import SolutionCache
+        _worker['cache'] = SolutionCache(cache_path)
+    _worker['perimeter'] = None
+    if perimeter_path is not None:
+        from perimeter_database import PerimeterDatabase
+        _worker['perimeter'] = PerimeterDatabase(perimeter_path)
+    _worker['max_nodes'] = max_nodes
+
+def _worker_kwargs(size):
+    """Return solver keyword arguments for a board, building tables once per size."""
+    kwargs = {} if _worker['cache'] is None else {'cache': _worker['cache']}
+    if _worker['perimeter'] is not None:
+        kwargs['perimeter'] = _worker['perimeter']
+    if _worker['max_nodes'] is not None:
+        kwargs['max_nodes'] = _worker['max_nodes']
+    heuristic = _worker['heuristic']
+    if heuristic is None:
+        return kwargs
+    if size not in _worker['heuristics']:
+        _worker['heuristics'][size] = get_heuristic(heuristic.name, size)
+    kwargs['heuristic'] = _worker['heuristics'][size]
+    return kwargs
+
+def _solve_one(item):
+    key, state = item
+    started = time.perf_counter()
+    try:
+        kwargs = _worker_kwargs(board_size(state))
+        # Anytime solvers also return the suboptimality bound of their path.
+        path, nodes, *bound = _worker['solver'](state, **kwargs)
+    except Exception as e:
+        # One failing solve must not end the whole batch.
+        return {'id': key, 'state': list(state), 'error': f"{type(e).__name__}: {e}"}
+    result = {
+        'id': key,
+        'state': list(state),
+        'path': None if path is None else ''.join(path),
+        'moves': None if path is None else len(path),
+        'nodes': nodes,
+        'seconds': round(time.perf_counter() - started, 6),
+        'worker': os.getpid(),
+    }
+    if bound:
+        result['bound'] = bound[0]
+    return result
+
+def _check_state(state):
+    """Return an error message for a bad state, or ``None`` if it is solvable."""
+    try:
+        board_size(state)
+    except ValueError as e:
+        return str(e)
+    if not all(isinstance(tile, int) for tile in state) or sorted(state) != list(range(len(state))):
+        return f"not a permutation of 0-{len(state) - 1}"
+    if not is_solvable(state):
+        return "unsolvable: wrong permutation parity"
+    return None
+
+def solve_many(states, solver='idastar', workers=None, chunksize=8,
+               heuristic=None, pdb_dir=None, partition='6-6-3', cache_path=None,
+               perimeter_path=None, max_nodes=None):
+    """Solve many puzzles over a process pool, yielding results as they finish.
+
+    States that are malformed or have the wrong permutation parity are
+    reported straight away and never reach a worker, as are items whose
+    state is an exception, such as the unparsable lines ``read_states``
+    yields. A solver that raises gives an error result for its state.
+
+    Args:
+        states (iterable): Items that are either a state or an
+            ``(id, state)`` pair; states are N*N-element sequences, 16
+            for the 15-puzzle.
+        solver (str or callable): A key of ``SOLVERS`` or a picklable
+            ``solver(state, **kwargs) -> (path, nodes)`` function; anytime
+            solvers may return ``(path, nodes, bound)``.
+        workers (int): Number of worker processes; defaults to the CPU count.
+        chunksize (int): States handed to a worker per scheduling round.
+        heuristic (str): Optional heuristic name passed to the solver.
+        pdb_dir (str): Optional pattern database directory; each worker maps
+            the tables once and uses them as the heuristic (4x4 boards only).
+        partition (str): Partition the pattern databases were built for.
+        cache_path (str): Optional ``SolutionCache`` file shared by the
+            workers; repeated positions are answered from it and new
+            solutions added. Only the ``astar`` solver supports it.
+        perimeter_path (str): Optional ``PerimeterDatabase`` file; each
+            worker maps it once and finishes a search on reaching it
+            (4x4 boards and the ``PERIMETER_SOLVERS`` only).
+        max_nodes (int): Optional cap on the nodes each solve holds in
+            memory, for the ``BOUNDED_SOLVERS``; ``astar`` falls back to
+            memory-bounded SMA* when it reaches the cap.
+
+    Yields:
+        dict: One result per state with ``id``, ``state``, ``path`` (a move
+              string or ``None``), ``moves``, ``nodes``, ``seconds`` and
+              ``worker`` (pid), plus ``bound`` for anytime solvers, or
+              ``id``, ``state`` and ``error``.
+    """
+    # A failing pool initializer is retried forever; fail here instead.
+    if pdb_dir is not None:
+        from pattern_database import AdditivePatternDatabase
+        AdditivePatternDatabase(pdb_dir, partition).close()
+    if cache_path is not None:
+        if SOLVERS.get(solver, solver) is not solve_astar:
+            raise ValueError("a solution cache needs the astar solver")
+        from solution_cache import SolutionCache
+        SolutionCache(cache_path).close()
+    if perimeter_path is not None:
+        if solver not in PERIMETER_SOLVERS:
+            raise ValueError(f"a perimeter database needs one of {', '.join(PERIMETER_SOLVERS)}")
+        from perimeter_database import PerimeterDatabase
+        PerimeterDatabase(perimeter_path).close()
+    if max_nodes is not None and solver not in BOUNDED_SOLVERS:
+        raise ValueError(f"a node cap needs one of {', '.join(BOUNDED_SOLVERS)}")
+    if ((heuristic is not None or pdb_dir is not None)
+            and solver in SOLVERS and solver not in HEURISTIC_SOLVERS):
+        raise ValueError(f"a heuristic needs one of {', '.join(HEURISTIC_SOLVERS)}")
+    rejected = deque()
+
+    def accepted():
+        for index, item in enumerate(states):
+            key, state = item if len(item) == 2 else (index, item)
+            if isinstance(state, Exception):
+                rejected.append({'id': key, 'error': str(state)})
+                continue
+            try:
+                state = tuple(state)
+            except TypeError:
+                rejected.append({'id': key, 'state': state, 'error': "state is not a sequence"})
+                continue
+            error = _check_state(state)
+            if error is None and pdb_dir is not None and len(state) != 16:
+                error = "pattern databases only cover the 4x4 board"
+            if error is None and perimeter_path is not None and len(state) != 16:
+                error = "perimeter databases only cover the 4x4 board"
+            if error is None:
+                yield key, state
+            else:
+                rejected.append({'id': key, 'state': list(state), 'error': error})
+
+    with multiprocessing.Pool(workers, _init_worker,
+                              (solver, heuristic, pdb_dir, partition, cache_path,
+                               perimeter_path, max_nodes)) as pool:
+        for result in pool.imap_unordered(_solve_one, accepted(), chunksize):
+            while rejected:
+                yield rejected.popleft()
+            yield result
+    while rejected:
+        yield rejected.popleft()
+
+def read_states(lines):
+    """Parse JSONL puzzle lines into ``(id, state)`` pairs.
+
+    Each non-empty line is either a JSON array of 16 tiles or an object
+    with a ``state`` array and an optional ``id``. A line that is neither
+    gives its id, or line number, paired with a ``ValueError`` describing
+    it, which ``solve_many`` reports as an error result.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, ValueError(f"line {number} is not JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield number, record
+        elif 'state' not in record:
+            yield record.get('id', number), ValueError(f"line {number} has no \"state\"")
+        else:
+            yield record.get('id', number), record['state']
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve 15-puzzle states from JSONL in parallel.")
+    parser.add_argument('input', nargs='?', default='-', help="JSONL file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL results file, or - for stdout")
+    parser.add_argument('--solver', default='idastar', choices=sorted(SOLVERS))
+    parser.add_argument('--heuristic', default=None, help="heuristic name, e.g. linear-conflict")
+    parser.add_argument('--pdb', default=None, help="pattern database directory")
+    parser.add_argument('--partition', default='6-6-3')
+    parser.add_argument('--cache', default=None, help="solution cache database (astar only)")
+    parser.add_argument('--perimeter', default=None,
+                        help="perimeter database file (astar, idastar or dfs)")
+    parser.add_argument('--max-nodes', type=int, default=None,
+                        help="most nodes a solve may hold in memory (astar or sma)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=8)
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for result in solve_many(read_states(source), args.solver, args.workers,
+                                 args.chunksize, args.heuristic, args.pdb, args.partition,
+                                 args.cache, args.perimeter, args.max_nodes):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
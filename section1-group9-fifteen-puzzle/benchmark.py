@@ -0,0 +1,257 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import time
+
+from batch_solve import SOLVERS, read_states
+from fifteenpuzzle import BLANK_MOVES, GOAL, get_heuristic, get_move_automaton, is_solvable
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_corpus.jsonl')
+CORPUS_SEED = 15
+
+# Random-walk lengths of the graded tiers; ``None`` is a uniformly random
+# solvable position.
+TIERS = {'walk10': 10, 'walk25': 25, 'walk50': 50, 'walk100': 100, 'uniform': None}
+
+# Runs faster than this are too noisy to flag as time regressions.
+MIN_COMPARED_SECONDS = 0.05
+
+def _random_walk(rng, moves):
+    """Return the state reached by ``moves`` random moves from ``GOAL``.
+
+    Moves that undo the previous one are skipped, so the walk really
+    travels ``moves`` steps instead of wandering back and forth.
+    """
+    board, blank, back = list(GOAL), GOAL.index(0), None
+    for _ in range(moves):
+        new_blank = rng.choice([cell for cell, _ in BLANK_MOVES[blank] if cell != back])
+        board[blank], board[new_blank] = board[new_blank], 0
+        blank, back = new_blank, blank
+    return tuple(board)
+
+def _uniform_position(rng):
+    """Return a uniformly random solvable state."""
+    while True:
+        state = list(GOAL)
+        rng.shuffle(state)
+        if is_solvable(tuple(state)):
+            return tuple(state)
+
+def make_corpus(seed=CORPUS_SEED, per_tier=10):
+    """Generate the graded benchmark positions.
+
+    Args:
+        seed (int): Seed of the generator, so the corpus is reproducible.
+        per_tier (int): Positions in each tier of ``TIERS``.
+
+    Returns:
+        list: ``(id, state)`` pairs such as ``('walk25-03', (...))``.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for tier, moves in TIERS.items():
+        for i in range(per_tier):
+            state = _uniform_position(rng) if moves is None else _random_walk(rng, moves)
+            corpus.append((f'{tier}-{i:02}', state))
+    return corpus
+
+def write_corpus(corpus, path):
+    """Write ``(id, state)`` pairs as JSONL readable by ``read_states``."""
+    with open(path, 'w') as f:
+        for key, state in corpus:
+            f.write(json.dumps({'id': key, 'state': list(state)}) + '\n')
+
+def load_corpus(path=CORPUS_PATH):
+    """Read a corpus file, e.g. the shipped one or Korf's 100 in JSONL."""
+    with open(path) as f:
+        return [(key, tuple(state)) for key, state in read_states(f)]
+
+def _run_one(solver, heuristic, state, memory_limit, conn):
+    if memory_limit:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        kwargs = {} if heuristic is None else {'heuristic': get_heuristic(heuristic)}
+        # Built once per process, so keep it out of the timed solve.
+        get_move_automaton()
+        started = time.perf_counter()
+        path, nodes, *bound = SOLVERS[solver](state, **kwargs)
+        seconds = time.perf_counter() - started
+    except MemoryError:
+        conn.send({'status': 'memory'})
+        return
+    except Exception as e:
+        conn.send({'status': 'error', 'error': repr(e)})
+        return
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024
+    record = {
+        'status': 'ok' if path is not None else 'unsolved',
+        'moves': None if path is None else len(path),
+        'nodes': nodes,
+        'seconds': round(seconds, 6),
+        'nodes_per_second': round(nodes / seconds) if seconds else None,
+        'peak_rss_kb': peak,
+    }
+    if bound:
+        record['bound'] = bound[0]
+    conn.send(record)
+
+def run_benchmark(corpus, solvers=('astar', 'idastar'), heuristic=None,
+                  time_limit=60.0, memory_limit=2048):
+    """Run every solver on every position, each in a fresh process.
+
+    A fresh process per run keeps one solve's memory from inflating the
+    next one's peak RSS, and lets a run over budget be stopped without
+    affecting the rest.
+
+    Args:
+        corpus (list): ``(id, state)`` pairs, e.g. from ``load_corpus``.
+        solvers (sequence): Keys of ``SOLVERS``.
+        heuristic (str): Optional heuristic name passed to the solvers.
+        time_limit (float): Seconds allowed per run; ``None`` for no limit.
+        memory_limit (int): Address-space budget per run in MiB; ``None``
+            or 0 for no limit.
+
+    Returns:
+        dict: The report, with the settings, one record per run under
+              ``results`` and per-solver totals under ``summary``.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for solver in solvers:
+        for key, state in corpus:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_run_one,
+                                      args=(solver, heuristic, state, memory_limit, sender))
+            process.start()
+            sender.close()
+            record = {'solver': solver, 'id': key}
+            if receiver.poll(time_limit):
+                try:
+                    record.update(receiver.recv())
+                except EOFError:
+                    # The child died without reporting, e.g. killed by the OOM killer.
+                    record['status'] = 'memory'
+            else:
+                process.terminate()
+                record['status'] = 'timeout'
+            process.join()
+            receiver.close()
+            results.append(record)
+            print(f"{solver:>14} {key:>12} {record['status']:>8} "
+                  f"{record.get('moves')} moves {record.get('nodes')} nodes "
+                  f"{record.get('seconds')} s", file=sys.stderr)
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'heuristic': heuristic,
+        'time_limit': time_limit,
+        'memory_limit': memory_limit,
+        'results': results,
+        'summary': summarize(results),
+    }
+
+def summarize(results):
+    """Return per-solver counts and totals over the solved runs."""
+    summary = {}
+    for record in results:
+        entry = summary.setdefault(record['solver'], {
+            'runs': 0, 'solved': 0, 'nodes': 0, 'seconds': 0.0, 'peak_rss_kb': 0})
+        entry['runs'] += 1
+        if record['status'] != 'ok':
+            continue
+        entry['solved'] += 1
+        entry['nodes'] += record['nodes']
+        entry['seconds'] = round(entry['seconds'] + record['seconds'], 6)
+        entry['peak_rss_kb'] = max(entry['peak_rss_kb'], record['peak_rss_kb'])
+    for entry in summary.values():
+        entry['nodes_per_second'] = round(entry['nodes'] / entry['seconds']) if entry['seconds'] else None
+    return summary
+
+def compare_reports(report, baseline, tolerance=0.10, time_tolerance=0.25):
+    """List the regressions of ``report`` against a saved ``baseline``.
+
+    Runs are matched by solver and position id; positions missing from
+    either report are ignored. Nodes and peak RSS are checked against
+    ``tolerance`` and time against the looser ``time_tolerance``, since
+    timings are noisy; runs under ``MIN_COMPARED_SECONDS`` are not timed.
+
+    Args:
+        report (dict): Report from ``run_benchmark``.
+        baseline (dict): Earlier report to compare with.
+        tolerance (float): Allowed relative growth of nodes and peak RSS.
+        time_tolerance (float): Allowed relative growth of solve time.
+
+    Returns:
+        list: One human-readable message per regression.
+    """
+    before = {(r['solver'], r['id']): r for r in baseline['results']}
+    regressions = []
+    for record in report['results']:
+        old = before.get((record['solver'], record['id']))
+        if old is None or old['status'] != 'ok':
+            continue
+        name = f"{record['solver']} {record['id']}"
+        if record['status'] != 'ok':
+            regressions.append(f"{name}: was solved, now {record['status']}")
+            continue
+        if record['moves'] > old['moves']:
+            regressions.append(f"{name}: {old['moves']} -> {record['moves']} moves")
+        for field, allowed in [('nodes', tolerance), ('peak_rss_kb', tolerance),
+                               ('seconds', time_tolerance)]:
+            if field == 'seconds' and record[field] < MIN_COMPARED_SECONDS:
+                continue
+            if record[field] > old[field] * (1 + allowed):
+                regressions.append(f"{name}: {field} {old[field]} -> {record[field]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the 15-puzzle solvers on a fixed corpus.")
+    parser.add_argument('--corpus', default=CORPUS_PATH, help="JSONL corpus file")
+    parser.add_argument('--tier', action='append', choices=sorted(TIERS),
+                        help="only run positions of this tier (repeatable)")
+    parser.add_argument('--solver', action='append', choices=sorted(SOLVERS),
+                        help="solver to run (repeatable); defaults to astar and idastar")
+    parser.add_argument('--heuristic', default=None, help="heuristic name, e.g. linear-conflict")
+    parser.add_argument('--time-limit', type=float, default=60.0, help="seconds per run")
+    parser.add_argument('--memory-limit', type=int, default=2048, help="MiB per run, 0 for none")
+    parser.add_argument('-o', '--output', default=None, help="write the JSON report here")
+    parser.add_argument('--baseline', default=None, help="report to check for regressions against")
+    parser.add_argument('--make-corpus', action='store_true',
+                        help="regenerate the corpus file from CORPUS_SEED and exit")
+    args = parser.parse_args()
+
+    if args.make_corpus:
+        write_corpus(make_corpus(), args.corpus)
+        return
+    corpus = load_corpus(args.corpus)
+    if args.tier:
+        corpus = [(key, state) for key, state in corpus if str(key).split('-')[0] in args.tier]
+    report = run_benchmark(corpus, args.solver or ('astar', 'idastar'), args.heuristic,
+                           args.time_limit, args.memory_limit)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(report, json.load(f))
+        for message in regressions:
+            print("REGRESSION", message, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
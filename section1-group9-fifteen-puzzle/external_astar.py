@@ -0,0 +1,359 @@
+import argparse
+import bisect
+import heapq
+import json
+import mmap
+import os
+import time
+from array import array
+
+from fifteenpuzzle import (OPPOSITE, board_size, get_engine, get_heuristic, is_solvable,
+                           print_board, scramble_puzzle)
+from pattern_database import AdditivePatternDatabase
+
+MANIFEST = 'manifest.json'
+# States read or written per disk access, and runs merged at once.
+CHUNK_STATES = 1 << 16
+FAN_IN = 64
+
+def _read_states(path):
+    """Stream the packed states of a run or bucket file in order."""
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(8 * CHUNK_STATES)
+            if not data:
+                return
+            yield from array('Q', data)
+
+def _write_states(path, states):
+    """Write a stream of packed states to ``path`` and return how many.
+
+    The file appears under its name only once complete, so a run
+    interrupted part-way leaves nothing half-written behind.
+    """
+    count = 0
+    buffer = array('Q')
+    with open(path + '.tmp', 'wb') as f:
+        for state in states:
+            buffer.append(state)
+            if len(buffer) >= CHUNK_STATES:
+                buffer.tofile(f)
+                count += len(buffer)
+                del buffer[:]
+        buffer.tofile(f)
+        count += len(buffer)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+    return count
+
+def _unique(states):
+    """Drop repeats from a sorted stream of states."""
+    last = None
+    for state in states:
+        if state != last:
+            yield state
+            last = state
+
+def _subtract(states, path):
+    """Drop from a sorted stream the states also in the sorted file ``path``."""
+    if not os.path.exists(path):
+        yield from states
+        return
+    other = _read_states(path)
+    blocked = next(other, None)
+    for state in states:
+        while blocked is not None and blocked < state:
+            blocked = next(other, None)
+        if state != blocked:
+            yield state
+
+class _Workspace:
+    """The files of one external search.
+
+    Bucket ``(g, h)`` holds the states first reached with ``g`` moves
+    whose heuristic value is ``h``, as a sorted file without repeats.
+    Children are written to it as sorted runs while its f-layer is still
+    ahead, and the runs are merged into the bucket just before it is
+    expanded.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # Run files waiting to be merged, by bucket, and the next run number.
+        self.runs = {}
+        self.next_run = 0
+        for name in os.listdir(directory):
+            if name.endswith('.tmp'):
+                os.remove(os.path.join(directory, name))
+            elif name.endswith('.run'):
+                g, h, number = (int(part) for part in name[:-4].split('-'))
+                self.runs.setdefault((g, h), []).append(os.path.join(directory, name))
+                self.next_run = max(self.next_run, number + 1)
+        self._maps = {}
+
+    def bucket(self, g, h):
+        return os.path.join(self.directory, f'{g}-{h}.bucket')
+
+    def add_run(self, g, h, states):
+        """Write sorted, repeat-free ``states`` as a new run of bucket ``(g, h)``."""
+        path = os.path.join(self.directory, f'{g}-{h}-{self.next_run}.run')
+        self.next_run += 1
+        _write_states(path, states)
+        self.runs.setdefault((g, h), []).append(path)
+
+    def merge(self, g, h):
+        """Merge the runs of bucket ``(g, h)`` into its bucket file.
+
+        Repeats are removed, and so are states already in bucket
+        ``(g - 2, h)``: a duplicate reached from a bucket with optimal g
+        lies at most two moves shallower, and the board graph is
+        bipartite, so it cannot lie one move shallower. Runs are merged
+        ``FAN_IN`` at a time, in as many passes as that takes.
+
+        Returns:
+            int: The number of states in the bucket, or 0 if it has none.
+        """
+        paths = self.runs.pop((g, h), [])
+        target = self.bucket(g, h)
+        if not paths:
+            return os.path.getsize(target) // 8 if os.path.exists(target) else 0
+        if os.path.exists(target):
+            # Left by a merge interrupted before it removed its runs.
+            paths.append(target)
+        while len(paths) > FAN_IN:
+            merged = []
+            for i in range(0, len(paths), FAN_IN):
+                group = paths[i:i + FAN_IN]
+                path = os.path.join(self.directory, f'{g}-{h}-{self.next_run}.run')
+                self.next_run += 1
+                _write_states(path, _unique(heapq.merge(*map(_read_states, group))))
+                self._remove(group, target)
+                merged.append(path)
+            paths = merged
+        states = _unique(heapq.merge(*map(_read_states, paths)))
+        count = _write_states(target, _subtract(states, self.bucket(g - 2, h)))
+        self._remove(paths, target)
+        return count
+
+    @staticmethod
+    def _remove(paths, keep):
+        for path in paths:
+            if path != keep:
+                os.remove(path)
+
+    def pending(self):
+        """Return whether any bucket still has runs to merge."""
+        return bool(self.runs)
+
+    def contains(self, g, h, packed):
+        """Return whether bucket ``(g, h)`` holds ``packed``, by binary search."""
+        if (g, h) not in self._maps:
+            path = self.bucket(g, h)
+            if not os.path.exists(path) or not os.path.getsize(path):
+                return False
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[g, h] = mapped, memoryview(mapped).cast('Q')
+        states = self._maps[g, h][1]
+        i = bisect.bisect_left(states, packed)
+        return i < len(states) and states[i] == packed
+
+    def close(self):
+        for mapped, states in self._maps.values():
+            states.release()
+            mapped.close()
+        self._maps.clear()
+
+def _heuristic_key(heuristic):
+    """Identify a heuristic for the manifest: its name and, for tables
+    built over tile groups, the groups, which the name alone does not tell."""
+    groups = getattr(heuristic, 'groups', None)
+    return [heuristic.name, None if groups is None else [list(tiles) for tiles in groups]]
+
+def _load_manifest(directory, start, heuristic):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest['start'] != list(start) or manifest['heuristic'] != _heuristic_key(heuristic):
+        raise ValueError(f"{directory} holds a search of another start state or heuristic")
+    return manifest
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+def solve_external(start, directory, heuristic=None, buffer_states=1 << 22, progress=None):
+    """Solve the 15-puzzle with external-memory A*, keeping the frontier on disk.
+
+    States are grouped into buckets by ``(g, h)``, each a sorted file of
+    packed states (see ``_Workspace``). The search expands the buckets of
+    one f-layer at a time, in increasing g, streaming each bucket from
+    disk. Children are collected in memory, at most ``buffer_states`` of
+    them, and written out as sorted runs whenever the buffer fills; runs
+    are merged into their bucket in external merge passes just before it
+    is expanded. Memory use thus stays fixed however large the search
+    grows, while disk use grows with the number of states reached.
+
+    After each bucket is expanded, the last finished bucket is recorded
+    in ``directory``'s manifest. Calling again with the same directory
+    resumes from there, and returns the stored answer once solved.
+
+    The heuristic must be consistent, i.e. drop by at most one per move,
+    as Manhattan distance does; only then is each state expanded once,
+    with its optimal g. Additive pattern databases are not consistent, a
+    move can lower them by more than one, so they are rejected up front
+    rather than hours into the search.
+
+    Args:
+        start (tuple): Start puzzle state as an N*N-element tuple (0 is
+            empty); boards up to 4x4, whose packed states fit 64 bits.
+        directory (str): Working directory; created if missing.
+        heuristic: Consistent heuristic, as for ``solve_astar``. Give it
+            by name to resume a search in a new process.
+        buffer_states (int): Children held in memory before a run is written.
+        progress: Optional ``progress(nodes, bound, frontier)`` callback,
+            called every 4096 expanded nodes with the f-layer being
+            expanded and the size of the bucket being expanded.
+
+    Returns:
+        tuple: ``(path, nodes_explored)`` where ``path`` is a list of moves
+               ('U','D','L','R') from start to goal, or ``None`` if the
+               start cannot reach the goal.
+
+    Raises:
+        ValueError: If the board is too large, the heuristic is a pattern
+            database or proves inconsistent, or the directory holds
+            another search.
+    """
+    size = board_size(start)
+    engine = get_engine(size)
+    if engine.bits * engine.cells > 64:
+        raise ValueError("external search needs packed states of at most 64 bits")
+    heuristic = get_heuristic(heuristic, size)
+    if isinstance(heuristic, AdditivePatternDatabase):
+        raise ValueError("pattern databases are not consistent; external search needs a "
+                         "consistent heuristic such as manhattan")
+    if not is_solvable(start):
+        return None, 0
+    workspace = _Workspace(directory)
+    manifest = _load_manifest(directory, start, heuristic)
+    packed = engine.pack(start)
+    if manifest is None:
+        h = heuristic.evaluate(packed)
+        workspace.add_run(0, h, [packed])
+        manifest = {'start': list(start), 'heuristic': _heuristic_key(heuristic),
+                    'f': h, 'g': -1, 'nodes': 0, 'path': None}
+        _save_manifest(directory, manifest)
+    elif manifest['path'] is not None:
+        return manifest['path'], manifest['nodes']
+    goal = engine.packed_goal
+    nodes_explored = manifest['nodes']
+    f, first_g = manifest['f'], manifest['g'] + 1
+    try:
+        while workspace.pending():
+            for g in range(first_g, f + 1):
+                h = f - g
+                count = workspace.merge(g, h)
+                if not count:
+                    continue
+                if h == 0 and workspace.contains(g, h, goal):
+                    path = _trace_path(workspace, engine, heuristic, goal, g)
+                    manifest.update(f=f, g=g, nodes=nodes_explored, path=path)
+                    _save_manifest(directory, manifest)
+                    return path, nodes_explored
+                nodes_explored = _expand_bucket(workspace, engine, heuristic, g, h, count,
+                                                buffer_states, nodes_explored, progress, f)
+                manifest.update(f=f, g=g, nodes=nodes_explored)
+                _save_manifest(directory, manifest)
+            f, first_g = f + 1, 0
+            manifest.update(f=f, g=-1)
+            _save_manifest(directory, manifest)
+    finally:
+        workspace.close()
+    return None, nodes_explored
+
+def _expand_bucket(workspace, engine, heuristic, g, h, count, buffer_states, nodes_explored,
+                   progress, f):
+    """Expand bucket ``(g, h)``, writing its children as runs of layer ``g + 1``."""
+    children = {}
+    buffered = 0
+
+    def flush():
+        for child_h, states in children.items():
+            workspace.add_run(g + 1, child_h, _unique(sorted(states)))
+        children.clear()
+
+    for packed in _read_states(workspace.bucket(g, h)):
+        nodes_explored += 1
+        if progress is not None and not nodes_explored & 0xFFF:
+            progress(nodes_explored, f, count)
+        blank = engine.blank_of(packed)
+        for neighbor, new_blank, _, tile in engine.neighbors(packed, blank):
+            child_h = heuristic.update(neighbor, h, tile, new_blank, blank)
+            if child_h < h - 1:
+                raise ValueError(f"{heuristic.name} heuristic is not consistent")
+            children.setdefault(child_h, array('Q')).append(neighbor)
+            buffered += 1
+            if buffered >= buffer_states:
+                flush()
+                buffered = 0
+    flush()
+    return nodes_explored
+
+def _trace_path(workspace, engine, heuristic, goal, depth):
+    """Walk back from the goal through the buckets to recover the moves.
+
+    Each state of bucket ``g`` has a neighbour in a bucket of ``g - 1``;
+    its bucket follows from the neighbour's heuristic value, and the
+    sorted file is binary-searched for it.
+    """
+    moves = []
+    packed, blank = goal, engine.blank_of(goal)
+    for g in range(depth - 1, -1, -1):
+        for neighbor, new_blank, move, _ in engine.neighbors(packed, blank):
+            if workspace.contains(g, heuristic.evaluate(neighbor), neighbor):
+                break
+        else:
+            raise RuntimeError(f"no predecessor of a depth-{g + 1} state on disk")
+        # ``move`` slid the blank away from ``packed``; the path runs the other way.
+        moves.append(OPPOSITE[move])
+        packed, blank = neighbor, new_blank
+    return moves[::-1]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve one 15-puzzle instance with external-memory A*.")
+    parser.add_argument('directory', help="working directory; rerun with it to resume")
+    parser.add_argument('state', nargs='?', default=None,
+                        help="JSON array of tiles; a 60-move scramble if omitted")
+    parser.add_argument('--heuristic', default=None, help="consistent heuristic name")
+    parser.add_argument('--buffer', type=int, default=1 << 22,
+                        help="children held in memory before a sorted run is written")
+    args = parser.parse_args()
+
+    state = tuple(json.loads(args.state)) if args.state else scramble_puzzle(60)
+    print_board(state)
+    started = time.perf_counter()
+
+    def progress(nodes, bound, frontier):
+        print(f"\rf={bound} nodes={nodes} bucket={frontier}", end='', flush=True)
+
+    path, nodes = solve_external(state, args.directory, args.heuristic, args.buffer, progress)
+    seconds = time.perf_counter() - started
+    print()
+    if path is None:
+        print(f"No solution ({nodes} nodes, {seconds:.2f} s)")
+    else:
+        print(f"{len(path)} moves: {''.join(path)}")
+        print(f"{nodes} nodes in {seconds:.2f} s")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,32 +1,391 @@
+import functools
 import heapq
+import math
+import os
 import random
-import pygame
+import shutil
+import subprocess
+import time
+from array import array
+from collections import deque
 
-GOAL = tuple(range(1, 16)) + (0,)
+OPPOSITE = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+MOVES = 'UDLR'
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+BIDIRECTIONAL_SLOT_MASK = (1 << 40) - 1
+# Longest move sequence searched for duplicates when building the move automaton.
+MOVE_PRUNING_DEPTH = 10
+# Weighted priorities are kept as integers in units of 1/WEIGHT_SCALE move.
+WEIGHT_SCALE = 16
+
+class PuzzleEngine:
+    """Precomputed tables for one N x N sliding-tile board.
+
+    Packed states store cell ``i`` in bits ``bits*i`` to ``bits*(i+1) - 1``;
+    four bits per tile up to the 15-puzzle, five for the 24-puzzle. Use
+    ``get_engine`` rather than constructing engines directly, so the
+    tables of each size are built once.
+
+    Args:
+        size (int): Board width, e.g. 3, 4 or 5.
+    """
+
+    def __init__(self, size):
+        if size < 2:
+            raise ValueError("board size must be at least 2")
+        self.size = size
+        self.cells = size * size
+        self.bits = max(4, (self.cells - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.goal = tuple(range(1, self.cells)) + (0,)
+        # For every blank index, the ``(new_blank_index, move)`` pairs it can slide to.
+        self.blank_moves = tuple(
+            tuple((idx + dr * size + dc, move)
+                  for dr, dc, move in [(-1, 0, 'U'), (1, 0, 'D'), (0, -1, 'L'), (0, 1, 'R')]
+                  if 0 <= idx // size + dr < size and 0 <= idx % size + dc < size)
+            for idx in range(self.cells))
+        # manhattan[tile][idx] is the distance of ``tile`` at ``idx`` from its goal.
+        self.manhattan = self.distance_table(self.goal)
+        self.packed_goal = self.pack(self.goal)
+
+    def distance_table(self, target):
+        """Return ``table[tile][idx]``: Manhattan distance to ``target``."""
+        size = self.size
+        cells = {tile: i for i, tile in enumerate(target)}
+        return tuple(
+            tuple(0 if tile == 0 else
+                  abs(idx // size - cells[tile] // size) + abs(idx % size - cells[tile] % size)
+                  for idx in range(self.cells))
+            for tile in range(self.cells))
+
+    def pack(self, state):
+        packed = 0
+        for i, tile in enumerate(state):
+            packed |= tile << (self.bits * i)
+        return packed
+
+    def unpack(self, packed):
+        bits, mask = self.bits, self.mask
+        return tuple((packed >> (bits * i)) & mask for i in range(self.cells))
+
+    def blank_of(self, packed):
+        for i in range(self.cells):
+            if not (packed >> (self.bits * i)) & self.mask:
+                return i
+        raise ValueError("packed state has no empty cell")
+
+    def neighbors(self, packed, blank):
+        bits, mask = self.bits, self.mask
+        neighbors = []
+        for new_blank, move in self.blank_moves[blank]:
+            tile = (packed >> (bits * new_blank)) & mask
+            neighbor = packed ^ (tile << (bits * new_blank)) ^ (tile << (bits * blank))
+            neighbors.append((neighbor, new_blank, move, tile))
+        return neighbors
+
+    def packed_manhattan(self, packed):
+        bits, mask, table = self.bits, self.mask, self.manhattan
+        distance = 0
+        for i in range(self.cells):
+            distance += table[(packed >> (bits * i)) & mask][i]
+        return distance
+
+@functools.lru_cache(maxsize=None)
+def get_engine(size=4):
+    """Return the cached ``PuzzleEngine`` for an N x N board."""
+    return PuzzleEngine(size)
+
+def board_size(state):
+    """Return the width of the square board a tuple state describes."""
+    size = math.isqrt(len(state))
+    if size * size != len(state):
+        raise ValueError(f"a state of {len(state)} cells is not a square board")
+    return size
+
+_ENGINE = get_engine(4)
+GOAL = _ENGINE.goal
+BLANK_MOVES = _ENGINE.blank_moves
+MANHATTAN = _ENGINE.manhattan
+PACKED_GOAL = _ENGINE.packed_goal
+
+def pack_state(state):
+    """Pack a tuple puzzle state into an integer.
+
+    Cell ``i`` is stored in bits ``4*i`` to ``4*i + 3``; boards with more
+    than 16 cells use five bits per cell (see ``PuzzleEngine``).
+
+    Args:
+        state (tuple): Puzzle state as an N*N-element tuple (0 is empty).
+
+    Returns:
+        int: The packed state.
+    """
+    return get_engine(board_size(state)).pack(state)
+
+def unpack_state(packed, size=4):
+    """Convert a packed integer state back to the tuple format.
+
+    Args:
+        packed (int): State produced by ``pack_state``.
+        size (int): Board width.
+
+    Returns:
+        tuple: Puzzle state as an N*N-element tuple (0 is empty).
+    """
+    return get_engine(size).unpack(packed)
+
+def packed_blank(packed, size=4):
+    """Return the index of the empty cell in a packed state."""
+    return get_engine(size).blank_of(packed)
+
+def get_packed_neighbors(packed, blank, size=4):
+    """Return the states reachable from a packed state in one move.
+
+    Args:
+        packed (int): Packed puzzle state.
+        blank (int): Index of the empty cell in ``packed``.
+        size (int): Board width.
+
+    Returns:
+        list: Tuples ``(neighbor, new_blank, move, tile)`` where ``tile`` is
+              the tile that slid from ``new_blank`` into ``blank``.
+    """
+    return get_engine(size).neighbors(packed, blank)
+
+def packed_manhattan(packed, size=4):
+    """Compute the Manhattan distance of a packed state."""
+    return get_engine(size).packed_manhattan(packed)
+
+def _as_packed(state, size=None):
+    """Return ``(engine, packed, blank)`` for a tuple or packed state."""
+    if isinstance(state, int):
+        engine = get_engine(size or 4)
+        return engine, state, engine.blank_of(state)
+    if size is not None and size != board_size(state):
+        raise ValueError(f"state does not describe a {size}x{size} board")
+    engine = get_engine(board_size(state))
+    return engine, engine.pack(state), state.index(0)
+
+def is_solvable(state, size=None):
+    """Check whether a state can reach the goal using the permutation parity.
+
+    On an odd-width board the number of tile inversions stays even. On an
+    even-width board every move keeps the parity of (inversions + blank
+    row) fixed, so it must match the goal's.
+
+    Args:
+        state (tuple or int): Puzzle state as a tuple or packed.
+        size (int): Board width; inferred from a tuple state, 4 if packed.
+
+    Returns:
+        bool: ``True`` if the state is solvable.
+    """
+    if isinstance(state, int):
+        state = unpack_state(state, size or 4)
+    size = board_size(state)
+    tiles = [tile for tile in state if tile]
+    inversions = 0
+    for i, tile in enumerate(tiles):
+        for other in tiles[i + 1:]:
+            if other < tile:
+                inversions += 1
+    if size % 2:
+        return inversions % 2 == 0
+    return (inversions + state.index(0) // size) % 2 == (size - 1) % 2
 
 def get_neighbors(state):
     """Return valid neighbor states reachable by sliding the empty tile.
 
     Args:
-        state (tuple): Current puzzle state as a 16-element tuple (0 is empty).
+        state (tuple): Current puzzle state as an N*N-element tuple
+            (0 is empty); 16 elements for the 15-puzzle.
 
     Returns:
         list: A list of tuples ``(neighbor_state, move)`` where ``move`` is
               one of 'U', 'D', 'L', 'R'.
     """
+    engine = get_engine(board_size(state))
     state = list(state)
     idx = state.index(0)
-    row, col = idx // 4, idx % 4
     neighbors = []
-    for dr, dc, move in [(-1, 0, 'U'), (1, 0, 'D'), (0, -1, 'L'), (0, 1, 'R')]:
-        new_row, new_col = row + dr, col + dc
-        if 0 <= new_row < 4 and 0 <= new_col < 4:
-            new_idx = new_row * 4 + new_col
-            new_state = state[:]
-            new_state[idx], new_state[new_idx] = new_state[new_idx], new_state[idx]
-            neighbors.append((tuple(new_state), move))
+    for new_idx, move in engine.blank_moves[idx]:
+        new_state = state[:]
+        new_state[idx], new_state[new_idx] = new_state[new_idx], new_state[idx]
+        neighbors.append((tuple(new_state), move))
     return neighbors
 
+def get_pruned_neighbors(packed, blank, state=0, size=4, automaton=None):
+    """Return the neighbors of a packed state that a move automaton allows.
+
+    Moves that undo the previous one, or that complete a longer sequence
+    with an equivalent shorter or earlier one, are left out; see
+    ``MoveAutomaton``.
+
+    Args:
+        packed (int): Packed puzzle state.
+        blank (int): Index of the empty cell in ``packed``.
+        state (int): Automaton state after the moves that reached
+            ``packed``; 0 for a start state.
+        size (int): Board width.
+        automaton (MoveAutomaton): Defaults to ``get_move_automaton()``.
+
+    Returns:
+        list: Tuples ``(neighbor, new_blank, move, tile, next_state)`` as
+              for ``get_packed_neighbors``, plus the automaton state to
+              pass on from ``neighbor``.
+    """
+    automaton = automaton or get_move_automaton()
+    neighbors = []
+    for neighbor, new_blank, move, tile in get_engine(size).neighbors(packed, blank):
+        next_state = automaton.step(state, move)
+        if next_state >= 0:
+            neighbors.append((neighbor, new_blank, move, tile, next_state))
+    return neighbors
+
+class MoveAutomaton:
+    """Finite-state machine over blank moves that rejects redundant sequences.
+
+    Reading the moves of a path one at a time, the automaton reaches a
+    rejecting transition as soon as the path ends in a duplicate: a move
+    sequence with an equivalent that is shorter, or as long and earlier
+    in ``MOVES`` order, and legal wherever the duplicate is. Every path
+    can be rewritten to one free of duplicates that is no longer and ends
+    in the same state, so depth-first solvers that skip rejected moves
+    still find optimal solutions, with a smaller branching factor and no
+    memory beyond one integer per level. Build it with
+    ``get_move_automaton``.
+
+    Args:
+        transitions (array): ``transitions[4 * state + MOVE_CODES[move]]``
+            is the next state, or -1 if the move is pruned.
+        depth (int): Longest sequence checked for duplicates.
+    """
+
+    def __init__(self, transitions, depth):
+        self.transitions = transitions
+        self.depth = depth
+
+    def __len__(self):
+        return len(self.transitions) // 4
+
+    def step(self, state, move):
+        """Return the state after ``move``, or -1 if the move is pruned."""
+        return self.transitions[4 * state + MOVE_CODES[move]]
+
+    def run(self, moves, state=0):
+        """Return the state after a move sequence, or -1 if it is pruned."""
+        for move in moves:
+            state = self.transitions[4 * state + MOVE_CODES[move]]
+            if state < 0:
+                break
+        return state
+
+def _duplicate_sequences(depth):
+    """Return the duplicate move sequences of at most ``depth`` moves.
+
+    Sequences are generated breadth-first, in ``MOVES`` order within a
+    length, on a board wide enough that none reaches an edge, so a
+    sequence rearranges the tiles the same way wherever it is legal. A
+    sequence is a duplicate if an earlier one leaves the same arrangement
+    with the blank confined to the rows and columns it visits, since the
+    earlier one is then legal wherever the duplicate is. Sequences ending
+    in a shorter duplicate are not extended.
+    """
+    width = 2 * depth + 3
+    origin = (depth + 1) * (width + 1)
+    offsets = {'U': -width, 'D': width, 'L': -1, 'R': 1}
+    row, col = divmod(origin, width)
+    # An arrangement is the set of moved ``(cell, home)`` pairs, the blank's
+    # home being ``origin``; each maps to the (top, bottom, left, right)
+    # extents of the blank over the sequences kept for it.
+    extents = {frozenset(): [(row, row, col, col)]}
+    duplicates = set()
+    layer = [('', {}, origin, (row, row, col, col))]
+    for _ in range(depth):
+        next_layer = []
+        for prefix, board, blank, (top, bottom, left, right) in layer:
+            for move in MOVES:
+                sequence = prefix + move
+                if any(sequence[i:] in duplicates for i in range(1, len(sequence) - 1)):
+                    continue
+                new_blank = blank + offsets[move]
+                moved = dict(board)
+                tile = moved.pop(new_blank, new_blank)
+                moved.pop(blank, None)
+                if tile != blank:
+                    moved[blank] = tile
+                if new_blank != origin:
+                    moved[new_blank] = origin
+                r, c = divmod(new_blank, width)
+                extent = (min(top, r), max(bottom, r), min(left, c), max(right, c))
+                arrangement = frozenset(moved.items())
+                earlier = extents.setdefault(arrangement, [])
+                if any(extent[0] <= other[0] and other[1] <= extent[1]
+                       and extent[2] <= other[2] and other[3] <= extent[3] for other in earlier):
+                    duplicates.add(sequence)
+                    continue
+                earlier.append(extent)
+                next_layer.append((sequence, moved, new_blank, extent))
+        layer = next_layer
+    return duplicates
+
+def build_move_automaton(depth=MOVE_PRUNING_DEPTH):
+    """Build a ``MoveAutomaton`` rejecting duplicates of up to ``depth`` moves.
+
+    The duplicates found by a bounded search are compiled Aho-Corasick
+    style: a trie of them with failure links, turned into a full
+    transition table over the nodes that do not end a duplicate.
+    ``depth`` 2 prunes only immediate reversals; each extra move takes
+    about three times longer to build and finds more cycles.
+    """
+    children, accepting = [{}], [False]
+    for sequence in _duplicate_sequences(depth):
+        node = 0
+        for move in sequence:
+            if move not in children[node]:
+                children[node][move] = len(children)
+                children.append({})
+                accepting.append(False)
+            node = children[node][move]
+        accepting[node] = True
+    delta = [None] * len(children)
+    delta[0] = {move: children[0].get(move, 0) for move in MOVES}
+    failure = [0] * len(children)
+    order = [0]
+    queue = deque(children[0].values())
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        accepting[node] = accepting[node] or accepting[failure[node]]
+        delta[node] = {}
+        for move in MOVES:
+            child = children[node].get(move)
+            if child is None:
+                delta[node][move] = delta[failure[node]][move]
+            else:
+                failure[child] = delta[failure[node]][move]
+                delta[node][move] = child
+                queue.append(child)
+    number = {}
+    for node in order:
+        if not accepting[node]:
+            number[node] = len(number)
+    transitions = array('i', [-1]) * (4 * len(number))
+    for node, state in number.items():
+        for code, move in enumerate(MOVES):
+            transitions[4 * state + code] = number.get(delta[node][move], -1)
+    return MoveAutomaton(transitions, depth)
+
+@functools.lru_cache(maxsize=None)
+def get_move_automaton(depth=MOVE_PRUNING_DEPTH):
+    """Return the cached ``MoveAutomaton`` for a duplicate-search depth."""
+    return build_move_automaton(depth)
+
+def _coded_blank_moves(engine):
+    """Return ``engine.blank_moves`` with each move's ``MOVE_CODES`` code added."""
+    return [[(new_blank, move, MOVE_CODES[move]) for new_blank, move in moves]
+            for moves in engine.blank_moves]
+
 def manhattan_distance(state):
     """Compute the Manhattan distance heuristic for a puzzle state.
 
@@ -34,103 +393,1172 @@ def manhattan_distance(state):
     from their current position to their goal position.
 
     Args:
-        state (tuple): Current puzzle state as a 16-element tuple (0 is empty).
+        state (tuple): Current puzzle state as an N*N-element tuple (0 is empty).
 
     Returns:
         int: The total Manhattan distance.
     """
-    distance = 0
-    for i in range(16):
-        if state[i] == 0:
-            continue
-        goal_idx = state[i] - 1
-        curr_row, curr_col = i // 4, i % 4
-        goal_row, goal_col = goal_idx // 4, goal_idx % 4
-        distance += abs(curr_row - goal_row) + abs(curr_col - goal_col)
-    return distance
+    table = get_engine(board_size(state)).manhattan
+    return sum(table[tile][i] for i, tile in enumerate(state))
+
+class Heuristic:
+    """Interface for admissible heuristics on packed states.
+
+    ``evaluate`` scores a whole state. ``update`` scores a child from its
+    parent's value after ``tile`` slid from cell ``src`` into the blank at
+    ``dst``; subclasses override it to touch only what that move changed.
+    Instances are also callable as ``heuristic(packed)``. ``size`` is the
+    board width the heuristic was built for, or ``None`` for any.
+    """
+
+    name = None
+    size = 4
+
+    def evaluate(self, packed):
+        raise NotImplementedError
+
+    def update(self, packed, h, tile, src, dst):
+        return self.evaluate(packed)
+
+    def __call__(self, packed):
+        return self.evaluate(packed)
+
+class _FunctionHeuristic(Heuristic):
+    """Adapter for a plain ``function(packed) -> int`` heuristic."""
+
+    size = None
+
+    def __init__(self, function):
+        self.function = function
+        self.name = getattr(function, '__name__', None)
+
+    def evaluate(self, packed):
+        return self.function(packed)
+
+class ManhattanHeuristic(Heuristic):
+    """Sum of the tiles' row and column distances to their goal cells.
+
+    Args:
+        size (int): Board width.
+        target (tuple or int): State to measure towards; defaults to the
+            goal. Bidirectional search uses this for its backward half.
+    """
+
+    name = 'manhattan'
+
+    def __init__(self, size=4, target=None):
+        self.size = size
+        self.engine = get_engine(size)
+        self.table = self.engine.manhattan
+        if target is not None:
+            if isinstance(target, int):
+                target = self.engine.unpack(target)
+            self.table = self.engine.distance_table(target)
+
+    def evaluate(self, packed):
+        bits, mask, table = self.engine.bits, self.engine.mask, self.table
+        distance = 0
+        for i in range(self.engine.cells):
+            distance += table[(packed >> (bits * i)) & mask][i]
+        return distance
+
+    def update(self, packed, h, tile, src, dst):
+        return h + self.table[tile][dst] - self.table[tile][src]
+
+def _line_conflicts(goals):
+    """Return how many tiles must leave a line so the rest are in order.
+
+    Args:
+        goals (list): Goal offsets within the line of the tiles that belong
+            to it, in their current order.
+    """
+    longest = []
+    for i, goal in enumerate(goals):
+        longest.append(1 + max([longest[j] for j in range(i) if goals[j] < goal], default=0))
+    return len(goals) - max(longest, default=0)
+
+class _LineTable(dict):
+    """Conflict counts of one row or column, keyed by its packed tiles.
+
+    Entries are computed on first lookup, so large boards only pay for
+    the lines that actually occur.
+    """
+
+    def __init__(self, engine, line, vertical):
+        super().__init__()
+        self.engine, self.line, self.vertical = engine, line, vertical
+
+    def __missing__(self, key):
+        size, bits, mask = self.engine.size, self.engine.bits, self.engine.mask
+        goals = []
+        for i in range(size):
+            tile = (key >> (bits * i)) & mask
+            if not tile:
+                continue
+            row, col = divmod(tile - 1, size)
+            if self.vertical and col == self.line:
+                goals.append(row)
+            elif not self.vertical and row == self.line:
+                goals.append(col)
+        self[key] = conflicts = _line_conflicts(goals)
+        return conflicts
+
+class LinearConflictHeuristic(Heuristic):
+    """Manhattan distance plus two moves per linear conflict.
+
+    Two tiles conflict when both are in their goal row (or column) but in
+    reversed order; one of them has to leave the line and come back. The
+    conflict count of each row and column content is cached per board
+    size, so an update only re-reads the two lines the moved tile left
+    and entered.
+
+    Args:
+        size (int): Board width.
+    """
+
+    name = 'linear-conflict'
+    _tables = {}
+
+    def __init__(self, size=4):
+        self.size = size
+        self.engine = engine = get_engine(size)
+        if size not in self._tables:
+            self._tables[size] = (
+                tuple(_LineTable(engine, line, False) for line in range(size)),
+                tuple(_LineTable(engine, line, True) for line in range(size)))
+        self.row_conflicts, self.col_conflicts = self._tables[size]
+        self.row_mask = (1 << (engine.bits * size)) - 1
+
+    def _column_key(self, packed, col):
+        """Gather the tiles of column ``col`` into one line key."""
+        size, bits, mask = self.size, self.engine.bits, self.engine.mask
+        key = 0
+        for row in range(size):
+            key |= ((packed >> (bits * (row * size + col))) & mask) << (bits * row)
+        return key
+
+    def evaluate(self, packed):
+        size, row_bits = self.size, self.engine.bits * self.size
+        conflicts = 0
+        for line in range(size):
+            conflicts += self.row_conflicts[line][(packed >> (row_bits * line)) & self.row_mask]
+            conflicts += self.col_conflicts[line][self._column_key(packed, line)]
+        return self.engine.packed_manhattan(packed) + 2 * conflicts
+
+    def update(self, packed, h, tile, src, dst):
+        size, bits = self.size, self.engine.bits
+        manhattan = self.engine.manhattan
+        h += manhattan[tile][dst] - manhattan[tile][src]
+        parent = packed ^ (tile << (bits * src)) ^ (tile << (bits * dst))
+        if src // size == dst // size:
+            # A sideways move keeps the row order; only two columns change.
+            table = self.col_conflicts
+            for col in (src % size, dst % size):
+                h += 2 * (table[col][self._column_key(packed, col)]
+                          - table[col][self._column_key(parent, col)])
+        else:
+            table, row_bits = self.row_conflicts, bits * size
+            for row in (src // size, dst // size):
+                shift = row_bits * row
+                h += 2 * (table[row][(packed >> shift) & self.row_mask]
+                          - table[row][(parent >> shift) & self.row_mask])
+        return h
+
+class _LineCodes(dict):
+    """Walking-distance codes of one packed row, computed on first use."""
+
+    def __init__(self, engine, vertical):
+        super().__init__()
+        self.engine, self.vertical = engine, vertical
+
+    def __missing__(self, key):
+        size, bits, mask = self.engine.size, self.engine.bits, self.engine.mask
+        base = size + 1
+        code = 0
+        for col in range(size):
+            tile = (key >> (bits * col)) & mask
+            if tile:
+                row, goal_col = divmod(tile - 1, size)
+                if self.vertical:
+                    code += base ** row
+                else:
+                    code += base ** goal_col * base ** (size * col)
+        self[key] = code
+        return code
+
+class WalkingDistanceHeuristic(Heuristic):
+    """Walking distance: vertical plus horizontal exact relaxed distances.
+
+    The vertical part only tracks how many tiles of each goal row sit in
+    each row, and counts the moves needed to sort those counts when the
+    blank may swap with any tile of a neighbouring row. The horizontal
+    part is the same on columns. Both share one breadth-first table per
+    board size; the count matrices are encoded per packed row, so a full
+    evaluation is 2N cached reads and two dictionary lookups.
+
+    Args:
+        size (int): Board width, at most ``MAX_SIZE``; the 5x5 table has
+            too many entries to build in memory.
+    """
+
+    name = 'walking-distance'
+    MAX_SIZE = 4
+    _tables = {}
+
+    def __init__(self, size=4):
+        if size > self.MAX_SIZE:
+            raise ValueError(f"walking distance supports boards up to {self.MAX_SIZE}x{self.MAX_SIZE}")
+        self.size = size
+        self.engine = get_engine(size)
+        if size not in self._tables:
+            self._tables[size] = self._build_tables(self.engine)
+        self.distance, self.row_codes, self.col_codes = self._tables[size]
+        self.row_mask = (1 << (self.engine.bits * size)) - 1
+        # A matrix is coded as sum(count[line][goal] * base**goal * base**(size*line)).
+        self.base = size + 1
+        self.line_weights = tuple(self.base ** (size * line) for line in range(size))
+
+    @staticmethod
+    def _build_tables(engine):
+        size = engine.size
+        base = size + 1
+        digit = lambda goal, line: base ** goal * base ** (size * line)
+        start = sum((size if line < size - 1 else size - 1) * digit(line, line)
+                    for line in range(size))
+        distance = {start: 0}
+        frontier = [(start, size - 1)]
+        while frontier:
+            next_frontier = []
+            for code, blank in frontier:
+                for line in (blank - 1, blank + 1):
+                    if not 0 <= line < size:
+                        continue
+                    for goal in range(size):
+                        if (code // digit(goal, line)) % base == 0:
+                            continue
+                        new = code - digit(goal, line) + digit(goal, blank)
+                        if new not in distance:
+                            distance[new] = distance[code] + 1
+                            next_frontier.append((new, line))
+            frontier = next_frontier
+        return distance, _LineCodes(engine, True), _LineCodes(engine, False)
+
+    def _vertical(self, packed):
+        row_bits, row_codes = self.engine.bits * self.size, self.row_codes
+        code = 0
+        for line, weight in enumerate(self.line_weights):
+            code += row_codes[(packed >> (row_bits * line)) & self.row_mask] * weight
+        return code
+
+    def _horizontal(self, packed):
+        row_bits, col_codes = self.engine.bits * self.size, self.col_codes
+        code = 0
+        for line in range(self.size):
+            code += col_codes[(packed >> (row_bits * line)) & self.row_mask]
+        return code
+
+    def evaluate(self, packed):
+        return self.distance[self._vertical(packed)] + self.distance[self._horizontal(packed)]
+
+    def update(self, packed, h, tile, src, dst):
+        # Only the axis the tile moved along changes; the parent's code on
+        # that axis differs from the child's by the one moved tile.
+        size, weights = self.size, self.line_weights
+        goal_row, goal_col = divmod(tile - 1, size)
+        if src // size == dst // size:
+            child = self._horizontal(packed)
+            parent = child + self.base ** goal_col * (weights[src % size] - weights[dst % size])
+        else:
+            child = self._vertical(packed)
+            parent = child + self.base ** goal_row * (weights[src // size] - weights[dst // size])
+        return h + self.distance[child] - self.distance[parent]
+
+HEURISTICS = {
+    'manhattan': ManhattanHeuristic,
+    'linear-conflict': LinearConflictHeuristic,
+    'walking-distance': WalkingDistanceHeuristic,
+}
+
+def get_heuristic(heuristic=None, size=4):
+    """Resolve a solver's ``heuristic`` argument to a ``Heuristic``.
+
+    Args:
+        heuristic: ``None`` for Manhattan distance, a name from
+            ``HEURISTICS``, a ``Heuristic`` instance, or a plain function
+            mapping a packed state to a lower bound.
+        size (int): Board width the solver works on.
+
+    Returns:
+        Heuristic: The heuristic to search with.
+
+    Raises:
+        ValueError: If a ``Heuristic`` was built for another board size.
+    """
+    if heuristic is None:
+        heuristic = 'manhattan'
+    if isinstance(heuristic, str):
+        return HEURISTICS[heuristic](size=size)
+    if not isinstance(heuristic, Heuristic):
+        return _FunctionHeuristic(heuristic)
+    if heuristic.size not in (None, size):
+        raise ValueError(f"{heuristic.name} heuristic is for {heuristic.size}x{heuristic.size} boards")
+    return heuristic
+
+class NodeArena:
+    """Flat store of search nodes linked by parent index.
+
+    Slot ``i`` holds a packed state and its blank index, the slot of its
+    parent (-1 for the root) and the code of the move that produced it.
+    Solvers keep only slot numbers on their frontier and rebuild the move
+    list once, from the goal's slot, instead of copying a path for every
+    node.
+
+    Args:
+        engine (PuzzleEngine): Board the states belong to; states wider
+            than 64 bits (the 24-puzzle) are kept in a plain list.
+    """
+
+    def __init__(self, engine=None):
+        wide = engine is not None and engine.bits * engine.cells > 64
+        self.states = [] if wide else array('Q')
+        self.blanks = bytearray()
+        self.parents = array('q')
+        self.moves = bytearray()
+
+    def __len__(self):
+        return len(self.states)
+
+    def add(self, state, blank, parent=-1, move=None):
+        """Store a node and return its slot."""
+        self.states.append(state)
+        self.blanks.append(blank)
+        self.parents.append(parent)
+        self.moves.append(0 if move is None else MOVE_CODES[move])
+        return len(self.states) - 1
+
+    def path(self, slot):
+        """Return the moves leading from the root to ``slot``."""
+        path = []
+        parents, moves = self.parents, self.moves
+        while parents[slot] >= 0:
+            path.append(MOVES[moves[slot]])
+            slot = parents[slot]
+        path.reverse()
+        return path
+
+class BucketQueue:
+    """Open list for small non-negative integer priorities.
+
+    ``buckets[f][g]`` holds the items pushed with priority ``f`` and cost
+    ``g``. ``pop`` takes from the lowest ``f`` and, within it, the highest
+    ``g``, i.e. the node closest to the goal by its estimate; within one
+    ``(f, g)`` pair it is last in, first out. Pushes and pops are list
+    appends and pops instead of heap sifts over compared entries.
+    """
 
-def solve_astar(start):   
-    """Solve the 15-puzzle using the A* search algorithm with Manhattan
-    distance heuristic.
+    def __init__(self):
+        self.buckets = []
+        self.lowest = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, f, g, item):
+        """Add ``item`` with priority ``f`` and cost ``g``."""
+        buckets = self.buckets
+        if f >= len(buckets):
+            buckets.extend([] for _ in range(f + 1 - len(buckets)))
+        bucket = buckets[f]
+        if g >= len(bucket):
+            bucket.extend([] for _ in range(g + 1 - len(bucket)))
+        bucket[g].append(item)
+        if f < self.lowest:
+            self.lowest = f
+        self.count += 1
+
+    def pop(self):
+        """Remove and return ``(f, g, item)`` with the lowest f, highest g."""
+        if not self.count:
+            raise IndexError("pop from an empty BucketQueue")
+        buckets, f = self.buckets, self.lowest
+        while True:
+            bucket = buckets[f]
+            while bucket and not bucket[-1]:
+                bucket.pop()
+            if bucket:
+                break
+            f += 1
+        self.lowest = f
+        self.count -= 1
+        g = len(bucket) - 1
+        return f, g, bucket[g].pop()
+
+def solve_astar(start, heuristic=None, size=None, weight=1, cache=None, perimeter=None,
+                progress=None, max_nodes=None):
+    """Solve the 15-puzzle using the A* search algorithm.
+
+    The search runs on packed integer states (see ``pack_state``) and
+    updates the heuristic incrementally from the one tile that moved.
+    With ``weight`` above 1 it runs weighted A* on ``f = g + weight*h``,
+    which expands far fewer nodes and returns a path at most ``weight``
+    times longer than optimal.
+
+    With a ``cache`` (see ``solution_cache.SolutionCache``) a stored start
+    is answered without searching. Otherwise every expanded state is
+    looked up; a stored one gives an exact path cost through it, and the
+    search stops as soon as no queued node can beat the cheapest such
+    cost. Optimal solutions found are added to the cache.
+
+    With a ``perimeter`` (see ``perimeter_database.PerimeterDatabase``)
+    the heuristic is exact near the goal, and the search ends as soon as
+    it expands a state inside the radius.
+
+    With ``max_nodes``, a search that comes to hold that many nodes is
+    given up and restarted as ``solve_sma`` under the same cap, so a hard
+    instance still gets an optimal answer instead of exhausting memory.
 
     Args:
-        start (tuple): Start puzzle state as a 16-element tuple (0 is empty).
+        start (tuple or int): Start puzzle state as an N*N-element tuple
+            (0 is empty; 16 elements for the 15-puzzle) or packed.
+        heuristic: Admissible heuristic to search with: a name from
+            ``HEURISTICS``, a ``Heuristic`` such as a loaded pattern
+            database, or a function of a packed state. Defaults to
+            Manhattan distance.
+        size (int): Board width; inferred from a tuple ``start``, 4 if packed.
+        weight (float): Heuristic weight, at least 1; rounded to a multiple
+            of ``1 / WEIGHT_SCALE``.
+        cache: Optional store of solved positions with ``lookup`` and
+            ``add`` methods, such as ``solution_cache.SolutionCache``.
+        perimeter: Optional database of exact distances near the goal
+            with ``radius``, ``wrap`` and ``path``.
+        progress: Optional ``progress(nodes, bound, frontier)`` callback,
+            called every 4096 expanded nodes with the f being expanded
+            (in moves) and the open-list size; see ``solver_runner``.
+        max_nodes (int): Optional cap on the nodes held; see above.
 
     Returns:
         tuple: ``(path, nodes_explored)`` where ``path`` is a list of moves
                ('U','D','L','R') from start to goal, or ``None`` if no
                solution found; ``nodes_explored`` is an int.
     """
-    frontier = [(manhattan_distance(start), 0, start, [])]
-    visited = set()
+    engine, start, blank = _as_packed(start, size)
+    if cache is not None:
+        cached = cache.lookup(start, engine.size)
+        if cached is not None:
+            return list(cached), 0
+    heuristic, radius = _with_perimeter(heuristic, perimeter, engine.size)
+    scale = _weight_scale(weight)
+    goal, neighbors = engine.packed_goal, engine.neighbors
+    nodes = NodeArena(engine)
+    states, blanks = nodes.states, nodes.blanks
+    # Priorities are ``g*WEIGHT_SCALE + scale*h`` divided by their common
+    # factor, so plain A* uses f itself and buckets stay dense.
+    unit = math.gcd(scale, WEIGHT_SCALE)
+    g_step, h_step = WEIGHT_SCALE // unit, scale // unit
+    frontier = BucketQueue()
+    frontier.push(h_step * heuristic.evaluate(start), 0, nodes.add(start, blank))
+    # Lowest g each state has been queued with; paths no shorter are never
+    # queued. Pattern databases need not be consistent, so a state reached
+    # again by a shorter path after its expansion is queued and reopened.
+    best_g = {start: 0}
+    # Cheapest path through a cached state: its cost, slot and cached moves.
+    incumbent = None
     nodes_explored = 0
+    path = None
     while frontier:
-        _, g, current, path = heapq.heappop(frontier)
-        if current in visited:
+        f, g, slot = frontier.pop()
+        if incumbent is not None and f >= incumbent[0] * g_step:
+            break
+        current, blank = states[slot], blanks[slot]
+        if best_g[current] < g:
             continue
-        visited.add(current)
         nodes_explored += 1
-        if current == GOAL:
-            return path, nodes_explored
-        for neighbor, move in get_neighbors(current):
-            if neighbor not in visited:
-                h = manhattan_distance(neighbor)
-                heapq.heappush(frontier, (g + 1 + h, g + 1, neighbor, path + [move]))
-    return None, nodes_explored
+        if progress is not None and not nodes_explored & 0xFFF:
+            progress(nodes_explored, f // g_step, len(frontier))
+        if current == goal:
+            path = nodes.path(slot)
+            break
+        if cache is not None:
+            cached = cache.lookup(current, engine.size)
+            if cached is not None:
+                # Nothing below ``current`` beats its exact distance.
+                if incumbent is None or g + len(cached) < incumbent[0]:
+                    incumbent = (g + len(cached), slot, cached)
+                continue
+        h = (f - g * g_step) // h_step
+        if h <= radius:
+            # Inside the perimeter h is exact, and f is the lowest queued.
+            path = nodes.path(slot) + perimeter.path(current)
+            break
+        new_g = g + 1
+        for neighbor, new_blank, move, tile in neighbors(current, blank):
+            if best_g.get(neighbor, new_g + 1) > new_g:
+                best_g[neighbor] = new_g
+                child_h = heuristic.update(neighbor, h, tile, new_blank, blank)
+                child = nodes.add(neighbor, new_blank, slot, move)
+                frontier.push(new_g * g_step + h_step * child_h, new_g, child)
+        if max_nodes is not None and len(nodes) >= max_nodes:
+            # Free the tree before the memory-bounded search builds its own.
+            nodes = frontier = best_g = incumbent = None
+            path, fallback_nodes = solve_sma(start, heuristic, engine.size, max_nodes,
+                                             progress=progress)
+            nodes_explored += fallback_nodes
+            break
+    if path is None and incumbent is not None:
+        path = nodes.path(incumbent[1]) + list(incumbent[2])
+    if path is not None and cache is not None and scale == WEIGHT_SCALE:
+        cache.add(start, path, engine.size)
+    return path, nodes_explored
+
+def _with_perimeter(heuristic, perimeter, size):
+    """Resolve ``heuristic`` and return it with the perimeter radius.
+
+    Without a perimeter the radius is -1, so ``h <= radius`` never holds.
+    """
+    heuristic = get_heuristic(heuristic, size)
+    if perimeter is None:
+        return heuristic, -1
+    if size != perimeter.size:
+        raise ValueError(f"the perimeter database is for {perimeter.size}x{perimeter.size} boards")
+    return perimeter.wrap(heuristic), perimeter.radius
+
+def _weight_scale(weight):
+    """Return ``weight`` in units of ``1 / WEIGHT_SCALE``, checking it is valid."""
+    if weight < 1:
+        raise ValueError("heuristic weight must be at least 1")
+    return round(weight * WEIGHT_SCALE)
+
+def solve_anytime(start, heuristic=None, size=None, weight=3, step=0.5,
+                  time_limit=0.1, max_nodes=None, progress=None):
+    """Solve the 15-puzzle with anytime repairing A* (ARA*).
 
-def solve_dfs(start, max_depth=50):
-    """Attempt to solve the 15-puzzle using depth-first search.
+    A first weighted-A* pass with a large ``weight`` finds a path quickly.
+    The weight is then lowered by ``step`` and the search resumed rather
+    than restarted: states whose cost improved after expansion are kept
+    aside and requeued with the open list, so each pass only repairs what
+    the previous one left. Passes continue until the weight reaches 1 and
+    the path is optimal, or the time or node budget runs out.
 
-    This is a basic DFS with a depth limit to avoid infinite exploration.
+    The reported bound is ``cost / lower_bound``, where the lower bound is
+    the smallest ``g + h`` still queued, capped by the weight of the last
+    finished pass. It is proven when the heuristic is consistent, as
+    Manhattan distance is.
 
     Args:
-        start (tuple): Start puzzle state as a 16-element tuple (0 is empty).
-        max_depth (int): Maximum search depth (inclusive).
+        start (tuple or int): Start puzzle state as an N*N-element tuple
+            (0 is empty; 16 elements for the 15-puzzle) or packed.
+        heuristic: Admissible heuristic, as for ``solve_astar``.
+        size (int): Board width; inferred from a tuple ``start``, 4 if packed.
+        weight (float): Weight of the first pass.
+        step (float): How much the weight drops after each pass.
+        time_limit (float): Wall-clock budget in seconds, or ``None``.
+        max_nodes (int): Budget of node expansions, or ``None``.
+        progress: Optional ``progress(nodes, bound, frontier)`` callback,
+            as for ``solve_astar``.
+
+    Returns:
+        tuple: ``(path, nodes_explored, bound)`` where ``path`` is the best
+               list of moves found, or ``None`` if the budget ran out
+               first, and ``bound`` is how many times longer than optimal
+               it can be at most (1.0 when proven optimal, ``None`` with
+               no path).
+    """
+    engine, start, blank = _as_packed(start, size)
+    if start == engine.packed_goal:
+        return [], 0, 1.0
+    heuristic = get_heuristic(heuristic, engine.size)
+    scale = _weight_scale(weight)
+    step = max(1, round(step * WEIGHT_SCALE))
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    goal, neighbors = engine.packed_goal, engine.neighbors
+    nodes = NodeArena(engine)
+    states, blanks = nodes.states, nodes.blanks
+    best_g = {start: 0}
+    h = heuristic.evaluate(start)
+    # Entries are ``(priority, g, h, slot)`` tuples; an entry is stale once
+    # its state has a smaller g. Weighted passes on larger boards can run
+    # past any fixed-width field, so nothing is packed.
+    frontier = [(scale * h, 0, h, nodes.add(start, blank))]
+    # Entries of states improved after their expansion in the current pass.
+    inconsistent = []
+    incumbent_g, incumbent = None, None
+    nodes_explored = 0
+
+    def improve():
+        """Run one pass; return ``False`` if the budget ran out."""
+        nonlocal incumbent_g, incumbent, nodes_explored
+        closed = set()
+        while frontier:
+            if incumbent_g is not None and frontier[0][0] >= incumbent_g * WEIGHT_SCALE:
+                return True
+            if max_nodes is not None and nodes_explored >= max_nodes:
+                return False
+            if deadline is not None and nodes_explored % 256 == 0 and time.perf_counter() > deadline:
+                return False
+            priority, g, h, slot = heapq.heappop(frontier)
+            current, blank = states[slot], blanks[slot]
+            if best_g[current] < g or current in closed:
+                continue
+            closed.add(current)
+            nodes_explored += 1
+            if progress is not None and not nodes_explored & 0xFFF:
+                progress(nodes_explored, priority // WEIGHT_SCALE, len(frontier))
+            for neighbor, new_blank, move, tile in neighbors(current, blank):
+                new_g = g + 1
+                if best_g.get(neighbor, new_g + 1) <= new_g:
+                    continue
+                best_g[neighbor] = new_g
+                child_h = heuristic.update(neighbor, h, tile, new_blank, blank)
+                child = nodes.add(neighbor, new_blank, slot, move)
+                if neighbor == goal:
+                    incumbent_g, incumbent = new_g, child
+                entry = (new_g * WEIGHT_SCALE + scale * child_h, new_g, child_h, child)
+                if neighbor in closed:
+                    inconsistent.append(entry)
+                else:
+                    heapq.heappush(frontier, entry)
+        return True
+
+    def live(entries):
+        for entry in entries:
+            if best_g[states[entry[3]]] == entry[1]:
+                yield entry
+
+    proven = None
+    while True:
+        finished = improve()
+        if finished and incumbent is not None:
+            proven = scale / WEIGHT_SCALE if proven is None else min(proven, scale / WEIGHT_SCALE)
+        if not finished or scale == WEIGHT_SCALE:
+            break
+        scale = max(WEIGHT_SCALE, scale - step)
+        # Requeue the open and inconsistent states under the new weight.
+        queued = {slot: (g, h) for _, g, h, slot in live(frontier + inconsistent)}
+        frontier[:] = [(g * WEIGHT_SCALE + scale * h, g, h, slot)
+                       for slot, (g, h) in queued.items()]
+        heapq.heapify(frontier)
+        inconsistent.clear()
+    if incumbent is None:
+        return None, nodes_explored, None
+    lower = min((g + h for _, g, h, _ in live(frontier + inconsistent)), default=None)
+    bound = 1.0 if lower is None or lower >= incumbent_g else incumbent_g / lower
+    if proven is not None:
+        bound = min(bound, proven)
+    return nodes.path(incumbent), nodes_explored, max(1.0, bound)
+
+class _TreeNode:
+    """A node of ``solve_sma``'s search tree; slots keep it small."""
+
+    __slots__ = ('packed', 'blank', 'g', 'h', 'f', 'parent', 'move', 'automaton_state',
+                 'children', 'forgotten', 'expanded', 'stamp')
+
+    def __init__(self, packed, blank, g, h, f, parent=None, move=None, automaton_state=0):
+        self.packed, self.blank, self.g, self.h, self.f = packed, blank, g, h, f
+        self.parent, self.move, self.automaton_state = parent, move, automaton_state
+        self.children = []
+        # Lowest f among the children dropped to save memory.
+        self.forgotten = float('inf')
+        self.expanded = False
+        # Bumped whenever the node is requeued; -1 once it is dropped.
+        self.stamp = 0
+
+def solve_sma(start, heuristic=None, size=None, max_nodes=1_000_000, automaton=None,
+              progress=None):
+    """Solve the 15-puzzle with memory-bounded A* (SMA*).
+
+    Like A*, the search expands the open node with the lowest f, deepest
+    first on ties, but it never holds more than ``max_nodes`` nodes. When
+    full it drops the leaf with the highest f, shallowest first, and keeps
+    that f in the leaf's parent as the cost of its forgotten children; the
+    parent is reopened at that cost and regenerates them only once nothing
+    cheaper is left. Once a node's children are generated its f is backed
+    up to the lowest of theirs, so a forgotten subtree keeps its best known
+    lower bound and regenerated children start from it.
+
+    It is a tree search, with moves pruned by the move automaton instead
+    of a closed set. The path found is optimal whenever an optimal path
+    fits in memory, i.e. is shorter than ``max_nodes`` moves, though a cap
+    only a few times the solution length makes it regenerate the same
+    subtrees over and over.
+
+    Args:
+        start (tuple or int): Start puzzle state as an N*N-element tuple
+            (0 is empty; 16 elements for the 15-puzzle) or packed.
+        heuristic: Admissible heuristic, as for ``solve_astar``.
+        size (int): Board width; inferred from a tuple ``start``, 4 if packed.
+        max_nodes (int): Most nodes held at once, at least 2.
+        automaton (MoveAutomaton): Move pruning to apply; defaults to
+            ``get_move_automaton()``.
+        progress: Optional ``progress(nodes, bound, frontier)`` callback,
+            called every 4096 expansions with the f being expanded and the
+            nodes held.
 
     Returns:
         tuple: ``(path, nodes_explored)`` where ``path`` is a list of moves
-               if a solution is found, otherwise ``None``; ``nodes_explored``
-               is an int of how many nodes were visited.
+               ('U','D','L','R') from start to goal, or ``None`` if none
+               fits in memory; ``nodes_explored`` counts expansions,
+               including regenerations.
     """
-    stack = [(start, [], 0)]
-    visited = set()
+    if max_nodes < 2:
+        raise ValueError("max_nodes must be at least 2")
+    engine, packed, blank = _as_packed(start, size)
+    heuristic = get_heuristic(heuristic, engine.size)
+    transitions = (automaton or get_move_automaton()).transitions
+    blank_moves = _coded_blank_moves(engine)
+    bits, mask, goal = engine.bits, engine.mask, engine.packed_goal
+    inf = float('inf')
+    h = heuristic.evaluate(packed)
+    root = _TreeNode(packed, blank, 0, h, h)
+    # Expansion candidates, lowest f and deepest first: unexpanded nodes at
+    # their f and expanded ones at the f of their forgotten children. And
+    # leaves to drop, highest f and shallowest first. Entries go stale when
+    # their node is requeued or dropped and are skipped when popped.
+    frontier, leaves = [], []
+    counter = 0
+    held = 1
     nodes_explored = 0
-    while stack:
-        current, path, depth = stack.pop()
-        if current in visited or depth > max_depth:
+
+    def queue(node):
+        nonlocal counter
+        node.stamp += 1
+        counter += 1
+        if not node.expanded:
+            heapq.heappush(frontier, (node.f, -node.g, counter, node.stamp, node))
+        elif node.forgotten < inf:
+            heapq.heappush(frontier, (node.forgotten, -node.g, counter, node.stamp, node))
+        if not node.children and node is not root:
+            heapq.heappush(leaves, (-node.f, node.g, counter, node.stamp, node))
+
+    def compact(heap):
+        heap[:] = [entry for entry in heap if entry[3] == entry[4].stamp]
+        heapq.heapify(heap)
+
+    queue(root)
+    while frontier:
+        bound, _, _, stamp, node = heapq.heappop(frontier)
+        if stamp != node.stamp:
             continue
-        visited.add(current)
+        if bound == inf:
+            break
+        if node.packed == goal:
+            path = []
+            while node.parent is not None:
+                path.append(node.move)
+                node = node.parent
+            return path[::-1], nodes_explored
         nodes_explored += 1
-        if current == GOAL:
+        if progress is not None and not nodes_explored & 0xFFF:
+            progress(nodes_explored, bound, held)
+        # Generate the children not held: all of them on a first expansion,
+        # the forgotten ones after that.
+        held_moves = {child.move for child in node.children}
+        node.expanded, node.forgotten = True, inf
+        current, node_blank = node.packed, node.blank
+        for new_blank, move, code in blank_moves[node_blank]:
+            next_state = transitions[4 * node.automaton_state + code]
+            if next_state < 0 or move in held_moves:
+                continue
+            tile = (current >> (bits * new_blank)) & mask
+            child = current ^ (tile << (bits * new_blank)) ^ (tile << (bits * node_blank))
+            child_h = heuristic.update(child, node.h, tile, new_blank, node_blank)
+            g = node.g + 1
+            # A non-goal node this deep could never hold a path to the goal.
+            f = inf if g >= max_nodes - 1 and child != goal else max(g + child_h, bound)
+            child = _TreeNode(child, new_blank, g, child_h, f, node, move, next_state)
+            node.children.append(child)
+            held += 1
+            queue(child)
+        queue(node)
+        # Back the new lowest f of the children up the tree.
+        while node is not None:
+            best = min(min((child.f for child in node.children), default=inf), node.forgotten)
+            if best == node.f:
+                break
+            node.f = best
+            queue(node)
+            node = node.parent
+        while held > max_nodes:
+            _, _, _, stamp, leaf = heapq.heappop(leaves)
+            if stamp != leaf.stamp:
+                continue
+            parent = leaf.parent
+            parent.children.remove(leaf)
+            parent.forgotten = min(parent.forgotten, leaf.f)
+            leaf.stamp = -1
+            held -= 1
+            queue(parent)
+        if len(frontier) > 2 * held + 4096:
+            compact(frontier)
+        if len(leaves) > 2 * held + 4096:
+            compact(leaves)
+    return None, nodes_explored
+
+def solve_dfs(start, max_depth=50, size=None, table_size=1 << 20, perimeter=None,
+              automaton=None, progress=None):
+    """Solve the 15-puzzle using iterative-deepening depth-first search.
+
+    Each iteration is a depth-limited DFS, so the first solution found is
+    one of the shortest. Moves rejected by the move automaton, which
+    undo the previous move or close a short cycle, are never made.
+    Within an iteration a transposition table keeps the shallowest depth
+    each state was reached at in each automaton state; a node reached
+    again no shallower has nothing new below it and is pruned. Every move
+    changes the blank's position parity, so limits step by two from the
+    blank's distance to its goal cell.
+
+    With a ``perimeter`` of radius R, a node at most R moves above the
+    limit is looked up once: inside the perimeter its exact distance
+    decides the iteration, and outside it nothing within reach can be
+    the goal, so the search never descends the last R levels.
+
+    Args:
+        start (tuple or int): Start puzzle state as an N*N-element tuple
+            (0 is empty; 16 elements for the 15-puzzle) or packed.
+        max_depth (int): Maximum search depth (inclusive).
+        size (int): Board width; inferred from a tuple ``start``, 4 if packed.
+        table_size (int): Most states the transposition table holds; once
+            full, new states are searched without being recorded.
+        perimeter: Optional database of exact distances near the goal
+            with ``radius``, ``distance`` and ``path``.
+        automaton (MoveAutomaton): Move pruning to apply; defaults to
+            ``get_move_automaton()``.
+        progress: Optional ``progress(nodes, bound, frontier)`` callback,
+            called at every new depth limit and every 4096 nodes with the
+            limit and the current depth.
+
+    Returns:
+        tuple: ``(path, nodes_explored)`` where ``path`` is a shortest list
+               of moves if one of at most ``max_depth`` moves exists,
+               otherwise ``None``; ``nodes_explored`` is an int of how many
+               nodes were visited over all iterations.
+    """
+    engine, packed, blank = _as_packed(start, size)
+    if perimeter is not None and engine.size != perimeter.size:
+        raise ValueError(f"the perimeter database is for {perimeter.size}x{perimeter.size} boards")
+    radius = -1 if perimeter is None else perimeter.radius
+    automaton = automaton or get_move_automaton()
+    transitions, states = automaton.transitions, len(automaton)
+    blank_moves = _coded_blank_moves(engine)
+    bits, goal = engine.bits, engine.packed_goal
+    board = list(engine.unpack(packed))
+    path = []
+    # Keyed by ``packed * states + automaton state``: what is searched below
+    # a node depends on both.
+    depths = {}
+    nodes_explored = 0
+
+    def search(blank, packed, depth, limit, state):
+        nonlocal nodes_explored
+        nodes_explored += 1
+        if progress is not None and not nodes_explored & 0xFFF:
+            progress(nodes_explored, limit, depth)
+        if packed == goal:
+            return True
+        if limit - depth <= radius:
+            # Shorter solutions were ruled out by earlier limits, so the
+            # goal is exactly ``limit - depth`` away or out of reach.
+            if perimeter.distance(packed) != limit - depth:
+                return False
+            path.extend(perimeter.path(packed))
+            return True
+        if depth == limit:
+            return False
+        depth += 1
+        for new_blank, move, code in blank_moves[blank]:
+            next_state = transitions[4 * state + code]
+            if next_state < 0:
+                continue
+            tile = board[new_blank]
+            child = packed ^ (tile << (bits * new_blank)) ^ (tile << (bits * blank))
+            key = child * states + next_state
+            seen = depths.get(key)
+            if seen is not None and seen <= depth:
+                continue
+            if seen is not None or len(depths) < table_size:
+                depths[key] = depth
+            board[blank], board[new_blank] = tile, 0
+            path.append(move)
+            if search(new_blank, child, depth, limit, next_state):
+                return True
+            path.pop()
+            board[blank], board[new_blank] = 0, tile
+        return False
+
+    last_cell = engine.cells - 1
+    limit = (abs(blank // engine.size - last_cell // engine.size)
+             + abs(blank % engine.size - last_cell % engine.size))
+    while limit <= max_depth:
+        if progress is not None:
+            progress(nodes_explored, limit, 0)
+        depths.clear()
+        depths[packed * states] = 0
+        if search(blank, packed, 0, limit, 0):
             return path, nodes_explored
-        for neighbor, move in get_neighbors(current):
-            if neighbor not in visited:
-                stack.append((neighbor, path + [move], depth + 1))
+        limit += 2
     return None, nodes_explored
 
-def scramble_puzzle(moves=50):
+def solve_idastar(start, heuristic=None, size=None, perimeter=None, automaton=None,
+                  progress=None):
+    """Solve the 15-puzzle using IDA*.
+
+    Each iteration is a depth-first search bounded by ``f = g + h``; the
+    next bound is the smallest f that exceeded the current one. A single
+    board is changed in place and restored on backtrack, so memory stays
+    linear in the solution depth instead of growing with the search.
+    Moves rejected by the move automaton are never made.
+
+    Args:
+        start (tuple or int): Start puzzle state as an N*N-element tuple
+            (0 is empty; 16 elements for the 15-puzzle) or packed.
+        heuristic: Admissible heuristic to search with: a name from
+            ``HEURISTICS``, a ``Heuristic`` such as a loaded pattern
+            database, or a function of a packed state. Defaults to
+            Manhattan distance.
+        size (int): Board width; inferred from a tuple ``start``, 4 if packed.
+        perimeter: Optional database of exact distances near the goal; an
+            iteration ends as soon as it reaches a state inside it.
+        automaton (MoveAutomaton): Move pruning to apply; defaults to
+            ``get_move_automaton()``.
+        progress: Optional ``progress(nodes, bound, frontier)`` callback,
+            called at every new f-bound and every 4096 nodes with the
+            bound and the current depth.
+
+    Returns:
+        tuple: ``(path, nodes_explored)`` where ``path`` is a list of moves
+               ('U','D','L','R') from start to goal, or ``None`` if no
+               solution found; ``nodes_explored`` is an int.
+    """
+    engine, packed, blank = _as_packed(start, size)
+    heuristic, _ = _with_perimeter(heuristic, perimeter, engine.size)
+    h = heuristic.evaluate(packed)
+    bound = h
+    nodes_explored = 0
+
+    def report(nodes, bound, depth):
+        progress(nodes_explored + nodes, bound, depth)
+
+    while True:
+        if progress is not None:
+            progress(nodes_explored, bound, 0)
+        result, path, nodes = bounded_search(engine, heuristic, packed, blank, 0, h, bound,
+                                             perimeter=perimeter, automaton=automaton,
+                                             progress=None if progress is None else report)
+        nodes_explored += nodes
+        if result is True:
+            return path, nodes_explored
+        if result == float('inf'):
+            return None, nodes_explored
+        bound = result
+
+class _SearchStopped(Exception):
+    """Raised inside ``bounded_search`` to unwind once ``stop`` is set."""
+
+def bounded_search(engine, heuristic, packed, blank, g, h, bound, automaton_state=0, stop=None,
+                   perimeter=None, automaton=None, progress=None):
+    """Run one IDA* iteration below a node: a DFS cut off at ``f > bound``.
+
+    Args:
+        engine (PuzzleEngine): Board the state belongs to.
+        heuristic (Heuristic): Admissible heuristic for ``engine``'s size.
+        packed (int): Packed state to search from.
+        blank (int): Index of the empty cell in ``packed``.
+        g (int): Moves already made to reach ``packed``.
+        h (int): Heuristic value of ``packed``.
+        bound (int): Largest f allowed.
+        automaton_state (int): State of ``automaton`` after the moves
+            that reached ``packed``; 0 at the root.
+        stop: Optional ``threading.Event``-like flag, polled every 4096
+            nodes; once set, the search gives up.
+        perimeter: Optional database of exact distances near the goal;
+            ``heuristic`` must be wrapped by its ``wrap``. A node inside
+            its radius within the bound ends the search.
+        automaton (MoveAutomaton): Move pruning to apply; defaults to
+            ``get_move_automaton()``.
+        progress: Optional ``progress(nodes, bound, depth)`` callback,
+            called every 4096 nodes with the nodes visited by this call.
+
+    Returns:
+        tuple: ``(result, path, nodes)``. ``result`` is ``True`` with
+               ``path`` the moves from ``packed`` to the goal, the smallest
+               f over ``bound`` seen (``inf`` when the tree is exhausted),
+               or ``None`` if stopped; ``nodes`` counts the nodes visited.
+    """
+    blank_moves = _coded_blank_moves(engine)
+    bits, goal = engine.bits, engine.packed_goal
+    radius = -1 if perimeter is None else perimeter.radius
+    transitions = (automaton or get_move_automaton()).transitions
+    board = list(engine.unpack(packed))
+    path = []
+    nodes_explored = 0
+
+    def search(blank, packed, g, h, state):
+        nonlocal nodes_explored
+        nodes_explored += 1
+        if not nodes_explored & 0xFFF:
+            if stop is not None and stop.is_set():
+                raise _SearchStopped
+            if progress is not None:
+                progress(nodes_explored, bound, g)
+        f = g + h
+        if f > bound:
+            return f
+        if packed == goal:
+            return True
+        if h <= radius:
+            # ``h`` is the exact distance here, so the goal is within the bound.
+            path.extend(perimeter.path(packed))
+            return True
+        minimum = float('inf')
+        for new_blank, move, code in blank_moves[blank]:
+            next_state = transitions[4 * state + code]
+            if next_state < 0:
+                continue
+            tile = board[new_blank]
+            # Only ``tile`` moves, from ``new_blank`` to ``blank``.
+            child = packed ^ (tile << (bits * new_blank)) ^ (tile << (bits * blank))
+            child_h = heuristic.update(child, h, tile, new_blank, blank)
+            board[blank], board[new_blank] = tile, 0
+            path.append(move)
+            result = search(new_blank, child, g + 1, child_h, next_state)
+            if result is True:
+                return True
+            path.pop()
+            board[blank], board[new_blank] = 0, tile
+            if result < minimum:
+                minimum = result
+        return minimum
+
+    try:
+        result = search(blank, packed, g, h, automaton_state)
+    except _SearchStopped:
+        return None, None, nodes_explored
+    return result, path if result is True else None, nodes_explored
+
+def solve_bidirectional(start, heuristic=None, backward_heuristic=None, size=None,
+                        progress=None):
+    """Solve the 15-puzzle with bidirectional heuristic search (MM).
+
+    One search runs forward from ``start`` and one backward from the goal;
+    moves are reversible, so both use the same move generator. Each side
+    expands nodes in order of ``max(f, 2g)``, which keeps either side from
+    going past the midpoint of an optimal path. Every time a child is
+    already known to the other side, the combined path length ``U`` is
+    recorded. The search stops once ``U`` is no larger than the smallest
+    priority still open, and at that point ``U`` is optimal.
+
+    Args:
+        start (tuple or int): Start puzzle state as an N*N-element tuple
+            (0 is empty; 16 elements for the 15-puzzle) or packed.
+        heuristic: Forward heuristic towards the goal, as for
+            ``solve_astar``.
+        backward_heuristic (Heuristic): Admissible estimate of the distance
+            to ``start``, used by the backward side, as a ``Heuristic``
+            instance or a plain function. Defaults to
+            ``ManhattanHeuristic(target=start)``.
+        size (int): Board width; inferred from a tuple ``start``, 4 if packed.
+        progress: Optional ``progress(nodes, bound, frontier)`` callback,
+            as for ``solve_astar``; the bound is the priority expanded and
+            the frontier both open lists.
+
+    Returns:
+        tuple: ``(path, nodes_explored)`` where ``path`` is a list of moves
+               ('U','D','L','R') from start to goal, or ``None`` if no
+               solution found; ``nodes_explored`` is an int.
+
+    Raises:
+        ValueError: If ``backward_heuristic`` is a name; named heuristics
+            estimate the distance to the goal, not to ``start``.
+    """
+    if isinstance(backward_heuristic, str):
+        raise ValueError("backward_heuristic must estimate the distance to start, not be a name")
+    engine, start, start_blank = _as_packed(start, size)
+    if start == engine.packed_goal:
+        return [], 0
+    if backward_heuristic is None:
+        backward_heuristic = ManhattanHeuristic(engine.size, target=start)
+    heuristics = (get_heuristic(heuristic, engine.size),
+                  get_heuristic(backward_heuristic, engine.size))
+    arenas = (NodeArena(engine), NodeArena(engine))
+    depths = (array('H'), array('H'))
+    # Best known slot of every state each side has generated.
+    seen = ({}, {})
+    closed = ({}, {})
+    frontiers = ([], [])
+    roots = [(start, start_blank), (engine.packed_goal, engine.cells - 1)]
+    for side, (state, blank) in enumerate(roots):
+        h = heuristics[side].evaluate(state)
+        slot = arenas[side].add(state, blank)
+        depths[side].append(0)
+        seen[side][state] = slot
+        # Entries encode (priority, g, h, slot) in one int.
+        frontiers[side].append(h << 56 | h << 40 | slot)
+    best, meeting = float('inf'), None
+    nodes_explored = 0
+    while frontiers[0] and frontiers[1]:
+        side = 0 if frontiers[0][0] <= frontiers[1][0] else 1
+        if best <= frontiers[side][0] >> 56:
+            break
+        entry = heapq.heappop(frontiers[side])
+        g, h, slot = (entry >> 48) & 0xFF, (entry >> 40) & 0xFF, entry & BIDIRECTIONAL_SLOT_MASK
+        arena, depth, known, other = arenas[side], depths[side], seen[side], seen[1 - side]
+        current, blank = arena.states[slot], arena.blanks[slot]
+        if closed[side].get(current, g + 1) <= g:
+            continue
+        closed[side][current] = g
+        nodes_explored += 1
+        if progress is not None and not nodes_explored & 0xFFF:
+            progress(nodes_explored, entry >> 56, len(frontiers[0]) + len(frontiers[1]))
+        for neighbor, new_blank, move, tile in engine.neighbors(current, blank):
+            new_g = g + 1
+            previous = known.get(neighbor)
+            if previous is not None and depth[previous] <= new_g:
+                continue
+            child_h = heuristics[side].update(neighbor, h, tile, new_blank, blank)
+            child = arena.add(neighbor, new_blank, slot, move)
+            depth.append(new_g)
+            known[neighbor] = child
+            priority = max(new_g + child_h, 2 * new_g)
+            heapq.heappush(frontiers[side], priority << 56 | new_g << 48 | child_h << 40 | child)
+            match = other.get(neighbor)
+            if match is not None and new_g + depths[1 - side][match] < best:
+                best = new_g + depths[1 - side][match]
+                meeting = (child, match) if side == 0 else (match, child)
+    if meeting is None:
+        return None, nodes_explored
+    forward, backward = arenas[0].path(meeting[0]), arenas[1].path(meeting[1])
+    return forward + [OPPOSITE[move] for move in reversed(backward)], nodes_explored
+
+def scramble_puzzle(moves=50, packed=False, size=4):
     """Return a scrambled puzzle state by applying random valid moves.
 
     Args:
         moves (int): Number of random moves to apply starting from the goal.
+        packed (bool): Return the packed integer form instead of a tuple.
+        size (int): Board width.
 
     Returns:
-        tuple: A new puzzle state as a 16-element tuple.
+        tuple or int: A new puzzle state as a ``size*size``-element tuple,
+                      or packed when ``packed`` is true.
     """
-    state = list(GOAL)
+    engine = get_engine(size)
+    state, blank = engine.packed_goal, engine.cells - 1
     for _ in range(moves):
-        neighbors = get_neighbors(tuple(state))
-        state = list(random.choice(neighbors)[0])
-    return tuple(state)
+        new_blank, _ = random.choice(engine.blank_moves[blank])
+        tile = (state >> (engine.bits * new_blank)) & engine.mask
+        state ^= (tile << (engine.bits * new_blank)) ^ (tile << (engine.bits * blank))
+        blank = new_blank
+    return state if packed else engine.unpack(state)
 
 def print_board(state):
-    """Print the puzzle state to stdout in a 4x4 grid format.
+    """Print the puzzle state to stdout as a square grid.
 
     Args:
-        state (tuple): Current puzzle state as a 16-element tuple (0 is empty).
+        state (tuple): Current puzzle state as an N*N-element tuple (0 is empty).
     """
-    for i in range(0, 16, 4):
-        print(' '.join(f'{state[j]:2}' if state[j] != 0 else ' .' for j in range(i, i + 4)))
+    n = board_size(state)
+    for i in range(0, n * n, n):
+        print(' '.join(f'{state[j]:2}' if state[j] != 0 else ' .' for j in range(i, i + n)))
     print()
 
 # def animate_pygame(start, solution, algorithm_name):
@@ -179,100 +1607,314 @@ def print_board(state):
 #         clock.tick(60)
 #     pygame.quit()
 
-def animate_pygame(start, solution, algorithm_name):
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mkv', '.avi', '.mov', '.gif')
+
+class BoardRenderer:
+    """Draws puzzle states from tile images rendered once.
+
+    Every tile and the blank cell are drawn to their own surface when the
+    renderer is created, and status texts are cached by content, so
+    drawing a move is two blits. The drawing methods return the rectangles
+    they changed for ``pygame.display.update``. Only fonts are initialised,
+    so a renderer can draw to plain surfaces with no display open. Like
+    the other drawing functions it imports pygame only when used, so
+    solving never needs pygame installed or prints its banner.
+
+    Args:
+        size (int): Board width in tiles.
+        width (int): Board width in pixels; a status bar is added below.
+    """
+
+    background = (200, 200, 200)
+
+    def __init__(self, size=4, width=400):
+        import pygame
+        pygame.font.init()
+        self.size = size
+        self.cell = width // size
+        self.width = self.cell * size
+        self.height = self.width + 50
+        self.font = pygame.font.Font(None, 36)
+        self.info_font = pygame.font.Font(None, 24)
+        self.tiles = {}
+        for tile in range(size * size):
+            surface = pygame.Surface((self.cell, self.cell))
+            if tile == 0:
+                surface.fill((100, 100, 100))
+            else:
+                surface.fill((255, 255, 255))
+                pygame.draw.rect(surface, (0, 0, 0), surface.get_rect(), 2)
+                text = self.font.render(str(tile), True, (0, 0, 0))
+                surface.blit(text, text.get_rect(center=surface.get_rect().center))
+            self.tiles[tile] = surface
+        self._texts = {}
+
+    def text(self, string, color=(0, 0, 0)):
+        """Return the cached status-bar rendering of ``string``."""
+        key = (string, color)
+        if key not in self._texts:
+            self._texts[key] = self.info_font.render(string, True, color)
+        return self._texts[key]
+
+    def cell_rect(self, index):
+        import pygame
+        row, col = divmod(index, self.size)
+        return pygame.Rect(col * self.cell, row * self.cell, self.cell, self.cell)
+
+    def draw_board(self, surface, state):
+        """Draw every cell of ``state``; return the board rectangle."""
+        import pygame
+        surface.fill(self.background)
+        for index, tile in enumerate(state):
+            surface.blit(self.tiles[tile], self.cell_rect(index))
+        return pygame.Rect(0, 0, self.width, self.width)
+
+    def draw_cells(self, surface, state, cells):
+        """Redraw only ``cells`` of ``state``; return their rectangles."""
+        rects = []
+        for index in cells:
+            rect = self.cell_rect(index)
+            surface.blit(self.tiles[state[index]], rect)
+            rects.append(rect)
+        return rects
+
+    def draw_status(self, surface, step, total, done="Complete! Close window to exit."):
+        """Draw the step counter and, after the last step, ``done``."""
+        import pygame
+        rect = pygame.Rect(0, self.width, self.width, self.height - self.width)
+        surface.fill(self.background, rect)
+        surface.blit(self.text(f"Step: {step}/{total}"), (10, self.width + 10))
+        if step >= total:
+            surface.blit(self.text(done, (0, 128, 0)), (10, self.width + 30))
+        return rect
+
+    def draw_message(self, surface, line, detail=None, color=(0, 0, 0)):
+        """Draw one or two lines in the status bar; return its rectangle.
+
+        Unlike the step counter these are rendered afresh each time, as
+        progress messages seldom repeat.
+        """
+        import pygame
+        rect = pygame.Rect(0, self.width, self.width, self.height - self.width)
+        surface.fill(self.background, rect)
+        surface.blit(self.info_font.render(line, True, color), (10, self.width + 10))
+        if detail is not None:
+            surface.blit(self.info_font.render(detail, True, color), (10, self.width + 30))
+        return rect
+
+def replay(start, solution):
+    """Yield ``(state, cells)`` after each move of ``solution``.
+
+    ``cells`` are the two indices the move changed: the old and the new
+    position of the empty cell.
+    """
+    engine = get_engine(board_size(start))
+    state = list(start)
+    blank = state.index(0)
+    for move in solution:
+        new_blank = dict((m, cell) for cell, m in engine.blank_moves[blank])[move]
+        state[blank], state[new_blank] = state[new_blank], 0
+        yield tuple(state), (blank, new_blank)
+        blank = new_blank
+
+def animate_pygame(start, solution, algorithm_name, move_delay=500):
     """Animate the puzzle solution using Pygame with automatic progression.
 
+    The board is drawn once; each move then redraws only the two cells it
+    changed and the status bar. Between moves the loop blocks in
+    ``pygame.event.wait`` instead of redrawing every frame.
+
     Args:
-        start (tuple): Start puzzle state as a 16-element tuple (0 is empty).
+        start (tuple): Start puzzle state as an N*N-element tuple (0 is empty).
         solution (list): List of moves ('U','D','L','R') to apply.
         algorithm_name (str): Name to display in the window title.
+        move_delay (int): Milliseconds between moves.
     """
+    import pygame
+    renderer, screen = _open_window(start, algorithm_name)
+    _play(renderer, screen, start, solution, move_delay)
+    pygame.quit()
+
+def _open_window(start, algorithm_name):
+    """Open the puzzle window with ``start`` drawn; return the renderer and screen."""
+    import pygame
+    n = board_size(start)
     pygame.init()
-    screen = pygame.display.set_mode((400, 450))
-    pygame.display.set_caption(f"15 Puzzle - {algorithm_name}")
-    font = pygame.font.Font(None, 36)
-    info_font = pygame.font.Font(None, 24)
-    clock = pygame.time.Clock()
-    current = start
+    renderer = BoardRenderer(n)
+    screen = pygame.display.set_mode((renderer.width, renderer.height))
+    pygame.display.set_caption(f"{n * n - 1} Puzzle - {algorithm_name}")
+    renderer.draw_board(screen, start)
+    return renderer, screen
+
+def _play(renderer, screen, start, solution, move_delay):
+    """Play ``solution`` from ``start`` until the window is closed."""
+    import pygame
+    renderer.draw_status(screen, 0, len(solution))
+    pygame.display.flip()
+    steps = replay(start, solution)
     step = 0
-    running = True
-    
-    # Animation timing
-    move_delay = 500  # milliseconds between moves
-    last_move_time = pygame.time.get_ticks()
-    
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-        
-        # Auto-advance to next step
-        current_time = pygame.time.get_ticks()
-        if step < len(solution) and current_time - last_move_time >= move_delay:
-            neighbors = get_neighbors(current)
-            for next_state, move in neighbors:
-                if move == solution[step]:
-                    current = next_state
-                    break
+    next_move = pygame.time.get_ticks() + move_delay
+
+    while True:
+        if step < len(solution):
+            event = pygame.event.wait(max(1, next_move - pygame.time.get_ticks()))
+        else:
+            event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            break
+        if event.type == pygame.VIDEOEXPOSE:
+            pygame.display.flip()
+        if step < len(solution) and pygame.time.get_ticks() >= next_move:
+            state, cells = next(steps)
             step += 1
-            last_move_time = current_time
-        
-        # Draw the puzzle
-        screen.fill((200, 200, 200))
-        for i in range(16):
-            row, col = i // 4, i % 4
-            x, y = col * 100, row * 100
-            if current[i] == 0:
-                pygame.draw.rect(screen, (100, 100, 100), (x, y, 100, 100))
-            else:
-                pygame.draw.rect(screen, (255, 255, 255), (x, y, 100, 100))
-                pygame.draw.rect(screen, (0, 0, 0), (x, y, 100, 100), 2)
-                text = font.render(str(current[i]), True, (0, 0, 0))
-                text_rect = text.get_rect(center=(x + 50, y + 50))
-                screen.blit(text, text_rect)
-        
-        # Draw step counter
-        info_text = info_font.render(f"Step: {step}/{len(solution)}", True, (0, 0, 0))
-        screen.blit(info_text, (10, 410))
-        
-        # Show completion message
-        if step >= len(solution):
-            complete_text = info_font.render("Complete! Close window to exit.", True, (0, 128, 0))
-            screen.blit(complete_text, (10, 430))
-        
-        pygame.display.flip()
-        clock.tick(60)
-    
+            dirty = renderer.draw_cells(screen, state, cells)
+            dirty.append(renderer.draw_status(screen, step, len(solution)))
+            pygame.display.update(dirty)
+            next_move += move_delay
+
+def watch_pygame(start, runner, algorithm_name, move_delay=500):
+    """Show a running solve live, then animate its solution.
+
+    The window opens at once on the start position, and the status bar
+    follows the runner's progress events; the loop wakes every 100 ms to
+    poll them. Closing the window cancels the search. Once the search
+    ends its solution is played as by ``animate_pygame``, or the reason
+    it ended is shown until the window is closed.
+
+    Args:
+        start (tuple): Start puzzle state as an N*N-element tuple (0 is empty).
+        runner (solver_runner.SolverRunner): Solve of ``start`` in progress.
+        algorithm_name (str): Name to display in the window title.
+        move_delay (int): Milliseconds between moves.
+
+    Returns:
+        dict: The runner's final event.
+    """
+    import pygame
+    from solver_runner import describe_result
+    renderer, screen = _open_window(start, algorithm_name)
+    renderer.draw_message(screen, "Searching...")
+    pygame.display.flip()
+    while not runner.done:
+        event = pygame.event.wait(100)
+        if event.type == pygame.QUIT:
+            runner.cancel()
+            pygame.quit()
+            return runner.result
+        if event.type == pygame.VIDEOEXPOSE:
+            pygame.display.flip()
+        progress = [e for e in runner.poll() if e['event'] == 'progress']
+        if progress:
+            latest = progress[-1]
+            pygame.display.update(renderer.draw_message(
+                screen, f"Searching: {latest['nodes']} nodes, {latest['seconds']:.1f} s",
+                f"Bound {latest['bound']}, frontier {latest['frontier']}"))
+    result = runner.result
+    if result['event'] == 'done' and result['path'] is not None:
+        _play(renderer, screen, start, result['path'], move_delay)
+    else:
+        pygame.display.update(renderer.draw_message(screen, describe_result(result),
+                                                    "Close window to exit.", (160, 0, 0)))
+        while pygame.event.wait().type != pygame.QUIT:
+            pygame.display.flip()
     pygame.quit()
-    
+    return result
+
+def export_frames(start, solution, output, fps=2, width=400):
+    """Write the solution replay to image files or a video, without a display.
+
+    Frames are drawn to an off-screen surface with the same renderer as
+    ``animate_pygame``: one for the start and one after every move.
+
+    Args:
+        start (tuple): Start puzzle state as an N*N-element tuple (0 is empty).
+        solution (list): List of moves ('U','D','L','R') to apply.
+        output (str): A directory, which receives ``frame_0000.png`` and
+            onwards, or a video file ending in one of ``VIDEO_EXTENSIONS``,
+            which is encoded by the ``ffmpeg`` executable.
+        fps (int): Frames per second of a video.
+        width (int): Board width in pixels.
+
+    Returns:
+        int: The number of frames written.
+
+    Raises:
+        RuntimeError: If a video is requested and ``ffmpeg`` is not on PATH.
+    """
+    import pygame
+    renderer = BoardRenderer(board_size(start), width)
+    surface = pygame.Surface((renderer.width, renderer.height))
+    renderer.draw_board(surface, start)
+    renderer.draw_status(surface, 0, len(solution), "Complete!")
+
+    def frames():
+        yield surface
+        for step, (state, cells) in enumerate(replay(start, solution), 1):
+            renderer.draw_cells(surface, state, cells)
+            renderer.draw_status(surface, step, len(solution), "Complete!")
+            yield surface
+
+    count = 0
+    if output.lower().endswith(VIDEO_EXTENSIONS):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError("writing a video needs ffmpeg on PATH; export to a directory instead")
+        command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                   '-s', f'{renderer.width}x{renderer.height}', '-r', str(fps), '-i', '-',
+                   '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+        if not output.lower().endswith('.gif'):
+            # The widely playable pixel format, rather than ffmpeg's RGB default.
+            command += ['-pix_fmt', 'yuv420p']
+        command.append(output)
+        with subprocess.Popen(command, stdin=subprocess.PIPE) as encoder:
+            for frame in frames():
+                encoder.stdin.write(pygame.image.tobytes(frame, 'RGB'))
+                count += 1
+            encoder.stdin.close()
+        if encoder.returncode:
+            raise RuntimeError(f"ffmpeg exited with status {encoder.returncode}")
+    else:
+        os.makedirs(output, exist_ok=True)
+        for frame in frames():
+            pygame.image.save(frame, os.path.join(output, f'frame_{count:04}.png'))
+            count += 1
+    return count
+
 def main():
     """Simple command-line interface to scramble and solve the 15-puzzle.
 
-    Prompts the user to choose A* or DFS, scrambles a puzzle, attempts to
-    solve it, and optionally animates the solution.
+    Prompts the user to choose A*, DFS or IDA*, scrambles a puzzle and
+    solves it in a background process (see ``solver_runner``). The search
+    can be watched in a pygame window that then animates the solution, or
+    followed in the terminal, where Ctrl+C cancels it.
     """
+    from solver_runner import SolverRunner, describe_result, print_progress
+    algorithms = {'1': ('astar', {}, "A*"), '2': ('dfs', {'max_depth': 20}, "DFS"),
+                  '3': ('idastar', {}, "IDA*")}
     while True:
-        print("\n1. A*  2. DFS  3. Exit")
+        print("\n1. A*  2. DFS  3. IDA*  4. Exit")
         choice = input("Choose: ").strip()
-        if choice == '3':
+        if choice == '4':
             break
-        if choice not in ['1', '2']:
+        if choice not in algorithms:
             continue
+        solver, kwargs, algorithm_name = algorithms[choice]
         start_state = scramble_puzzle(50)
         print("\nInitial State:")
         print_board(start_state)
-        if choice == '1':
-            solution, nodes = solve_astar(start_state)
-            algorithm_name = "A*"
-        else:
-            solution, nodes = solve_dfs(start_state, 20)
-            algorithm_name = "DFS"
-        if solution:
-            print(f"Solution: {len(solution)} moves, {nodes} nodes")
-            if input("Animate? (y/n): ").strip().lower() == 'y':
+        watch = input("Watch in a window? (y/n): ").strip().lower() == 'y'
+        with SolverRunner(solver, start_state, **kwargs) as runner:
+            if watch:
+                result = watch_pygame(start_state, runner, algorithm_name)
+            else:
+                result = print_progress(runner)
+        if result['event'] == 'done' and result['path'] is not None:
+            solution = result['path']
+            print(f"Solution: {len(solution)} moves, {result['nodes']} nodes")
+            if not watch and input("Animate? (y/n): ").strip().lower() == 'y':
                 animate_pygame(start_state, solution, algorithm_name)
         else:
-            print(f"No solution ({nodes} nodes explored)")
+            print(describe_result(result))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+import argparse
+import json
+import multiprocessing
+import time
+
+from fifteenpuzzle import (board_size, bounded_search, get_engine, get_heuristic,
+                           get_move_automaton, get_pruned_neighbors, print_board,
+                           scramble_puzzle)
+
+# Per-process search settings, filled in by ``_init_worker``.
+_worker = {}
+
+def _load_heuristic(heuristic, size, pdb_dir, partition):
+    if pdb_dir is not None:
+        from pattern_database import AdditivePatternDatabase
+        return AdditivePatternDatabase(pdb_dir, partition)
+    return get_heuristic(heuristic, size)
+
+def _init_worker(heuristic, size, pdb_dir, partition, stop):
+    _worker['engine'] = get_engine(size)
+    _worker['heuristic'] = _load_heuristic(heuristic, size, pdb_dir, partition)
+    _worker['stop'] = stop
+    # Build the move automaton before the first subtree search needs it.
+    get_move_automaton()
+
+def _search_subtree(task):
+    index, packed, blank, g, h, automaton_state, bound = task
+    stop = _worker['stop']
+    if stop.is_set():
+        return index, None, None, 0
+    result, path, nodes = bounded_search(_worker['engine'], _worker['heuristic'],
+                                         packed, blank, g, h, bound, automaton_state, stop)
+    if result is True:
+        stop.set()
+    return index, result, path, nodes
+
+def split_root(engine, heuristic, packed, blank, count):
+    """Expand the root breadth-first until a level has ``count`` nodes.
+
+    Moves the move automaton rejects are skipped, as in the search
+    itself, and a state reached in the same automaton state twice within
+    a level is kept once.
+
+    Args:
+        engine (PuzzleEngine): Board the state belongs to.
+        heuristic (Heuristic): Heuristic giving each node's h.
+        packed (int): Packed start state.
+        blank (int): Index of the empty cell in ``packed``.
+        count (int): Smallest frontier wanted.
+
+    Returns:
+        tuple: ``(frontier, solution)``. ``frontier`` is a list of
+               ``(packed, blank, h, automaton_state, prefix)`` nodes all at the same
+               depth; ``solution`` is a move list if the goal was met
+               while expanding, in which case it is optimal.
+    """
+    level = [(packed, blank, heuristic.evaluate(packed), 0, [])]
+    while True:
+        for state, _, _, _, prefix in level:
+            if state == engine.packed_goal:
+                return level, prefix
+        if len(level) >= count:
+            return level, None
+        next_level = {}
+        for state, blank, h, automaton_state, prefix in level:
+            for neighbor, new_blank, move, tile, next_state in get_pruned_neighbors(
+                    state, blank, automaton_state, engine.size):
+                if (neighbor, next_state) in next_level:
+                    continue
+                child_h = heuristic.update(neighbor, h, tile, new_blank, blank)
+                next_level[neighbor, next_state] = (neighbor, new_blank, child_h, next_state,
+                                                    prefix + [move])
+        level = list(next_level.values())
+
+def solve_parallel(start, heuristic=None, size=None, workers=None, tasks_per_worker=16,
+                   pdb_dir=None, partition='6-6-3'):
+    """Solve one hard instance with IDA* spread over a process pool.
+
+    The root is expanded to a shallow frontier of about ``tasks_per_worker``
+    nodes per worker. Each f-threshold iteration then hands the frontier
+    nodes within the bound to the pool as independent subtree searches;
+    having many more subtrees than workers keeps all of them busy while
+    the subtrees differ in size. The first worker to reach the goal sets a
+    shared stop flag, and the others abandon their subtrees within a few
+    thousand nodes. Every solution within the current bound has cost equal
+    to it, since all smaller bounds failed, so the result is optimal.
+
+    Args:
+        start (tuple or int): Start puzzle state as an N*N-element tuple
+            (0 is empty; 16 elements for the 15-puzzle) or packed.
+        heuristic (str): Heuristic name from ``HEURISTICS``, or ``None``
+            for Manhattan distance; each worker builds its own tables.
+        size (int): Board width; inferred from a tuple ``start``, 4 if packed.
+        workers (int): Number of worker processes; defaults to the CPU count.
+        tasks_per_worker (int): Frontier nodes wanted per worker.
+        pdb_dir (str): Optional pattern database directory to use as the
+            heuristic instead; each worker maps the tables once.
+        partition (str): Partition the pattern databases were built for.
+
+    Returns:
+        tuple: ``(path, nodes_explored)`` where ``path`` is a list of moves
+               ('U','D','L','R') from start to goal, or ``None`` if no
+               solution found; ``nodes_explored`` is an int.
+    """
+    if isinstance(start, int):
+        engine = get_engine(size or 4)
+        packed, blank = start, engine.blank_of(start)
+    else:
+        engine = get_engine(board_size(start))
+        packed, blank = engine.pack(start), start.index(0)
+    workers = workers or multiprocessing.cpu_count()
+    # Loading here also fails fast: a failing pool initializer is retried forever.
+    local = _load_heuristic(heuristic, engine.size, pdb_dir, partition)
+    frontier, solution = split_root(engine, local, packed, blank, workers * tasks_per_worker)
+    if hasattr(local, 'close'):
+        local.close()
+    if solution is not None:
+        return solution, len(frontier)
+    depth = len(frontier[0][4])
+    bound = min(depth + h for _, _, h, _, _ in frontier)
+    nodes_explored = len(frontier)
+    stop = multiprocessing.Event()
+    with multiprocessing.Pool(workers, _init_worker,
+                              (heuristic, engine.size, pdb_dir, partition, stop)) as pool:
+        while True:
+            stop.clear()
+            next_bound = float('inf')
+            tasks = []
+            for index, (state, node_blank, h, automaton_state, _) in enumerate(frontier):
+                if depth + h > bound:
+                    next_bound = min(next_bound, depth + h)
+                else:
+                    tasks.append((index, state, node_blank, depth, h, automaton_state, bound))
+            for index, result, path, nodes in pool.imap_unordered(_search_subtree, tasks):
+                nodes_explored += nodes
+                if result is True:
+                    # Every path found within this bound has the same, optimal length.
+                    solution = solution or frontier[index][4] + path
+                elif result is not None:
+                    next_bound = min(next_bound, result)
+            if solution is not None:
+                return solution, nodes_explored
+            if next_bound == float('inf'):
+                return None, nodes_explored
+            bound = next_bound
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve one 15-puzzle instance with parallel IDA*.")
+    parser.add_argument('state', nargs='?', default=None,
+                        help="JSON array of tiles; a 60-move scramble if omitted")
+    parser.add_argument('--heuristic', default=None, help="heuristic name, e.g. linear-conflict")
+    parser.add_argument('--pdb', default=None, help="pattern database directory")
+    parser.add_argument('--partition', default='6-6-3')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--tasks-per-worker', type=int, default=16)
+    args = parser.parse_args()
+
+    state = tuple(json.loads(args.state)) if args.state else scramble_puzzle(60)
+    print_board(state)
+    started = time.perf_counter()
+    path, nodes = solve_parallel(state, args.heuristic, workers=args.workers,
+                                 tasks_per_worker=args.tasks_per_worker,
+                                 pdb_dir=args.pdb, partition=args.partition)
+    seconds = time.perf_counter() - started
+    if path is None:
+        print(f"No solution ({nodes} nodes, {seconds:.2f} s)")
+    else:
+        print(f"{len(path)} moves: {''.join(path)}")
+        print(f"{nodes} nodes in {seconds:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import mmap
+import os
+import struct
+from array import array
+
+from fifteenpuzzle import GOAL, Heuristic
+
+# Disjoint tile partitions; the values of their pattern databases add up.
+PARTITIONS = {
+    '6-6-3': ((1, 5, 6, 9, 10, 13), (7, 8, 11, 12, 14, 15), (2, 3, 4)),
+    '7-8': ((1, 2, 3, 4, 5, 6, 7), (8, 9, 10, 11, 12, 13, 14, 15)),
+    '5-5-5': ((1, 2, 3, 5, 6), (4, 7, 8, 11, 12), (9, 10, 13, 14, 15)),
+}
+
+# Largest group the pure-Python builder can finish: a 6-tile table has
+# 5,765,760 entries, while a 7-tile table has ten times more and the 8-tile
+# group of '7-8' has 518,918,400. Bigger tables can still be loaded.
+MAX_BUILD_TILES = 6
+BUILDABLE_PARTITIONS = tuple(sorted(
+    name for name, groups in PARTITIONS.items()
+    if max(map(len, groups)) <= MAX_BUILD_TILES))
+
+MAGIC = b'PDB1'
+
+# Cells reachable from each cell in one step, as bitmasks.
+ADJACENT = tuple(
+    sum(1 << (r * 4 + c)
+        for r, c in [(i // 4 - 1, i % 4), (i // 4 + 1, i % 4),
+                     (i // 4, i % 4 - 1), (i // 4, i % 4 + 1)]
+        if 0 <= r < 4 and 0 <= c < 4)
+    for i in range(16))
+
+def pattern_size(tiles):
+    """Return the number of entries in the table for ``tiles``."""
+    size = 1
+    for i in range(len(tiles)):
+        size *= 16 - i
+    return size
+
+def rank_positions(positions):
+    """Map distinct cell positions to a dense index in ``[0, 16!/(16-k)!)``.
+
+    Args:
+        positions (sequence): Cell index of each pattern tile, in order.
+
+    Returns:
+        int: The rank of the partial permutation.
+    """
+    rank = 0
+    used = 0
+    for i, pos in enumerate(positions):
+        rank = rank * (16 - i) + pos - (used & ((1 << pos) - 1)).bit_count()
+        used |= 1 << pos
+    return rank
+
+def _blank_region(blank, occupied):
+    """Return the mask of free cells connected to ``blank``."""
+    free = 0xFFFF & ~occupied
+    region = 1 << blank
+    while True:
+        grown = region
+        grown |= (region << 4) | (region >> 4)
+        grown |= (region << 1) & 0xEEEE | (region >> 1) & 0x7777
+        grown &= free
+        if grown == region:
+            return region
+        region = grown
+
+def build_pattern_database(tiles):
+    """Build the additive pattern database for one group of tiles.
+
+    Runs a backward breadth-first search from the goal over placements of
+    ``tiles`` and the blank. Only moves of pattern tiles are counted; the
+    blank wanders freely through the other cells, so each state keeps the
+    whole free region the blank can reach. Each entry stores the fewest
+    pattern-tile moves needed for that placement, which lets tables built
+    for disjoint groups be added together.
+
+    Args:
+        tiles (sequence): The tile numbers in the pattern.
+
+    Returns:
+        bytearray: One distance per ``rank_positions`` index.
+    """
+    tiles = tuple(tiles)
+    size = pattern_size(tiles)
+    table = bytearray(b'\xff') * size
+    # Bitmask of blank-region representatives seen per placement.
+    seen = array('H', bytes(2 * size))
+    goal = tuple(GOAL.index(tile) for tile in tiles)
+    occupied = sum(1 << pos for pos in goal)
+    region = _blank_region(GOAL.index(0), occupied)
+    rank = rank_positions(goal)
+    table[rank] = 0
+    seen[rank] = region & -region
+    frontier = [(goal, region)]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for positions, region in frontier:
+            occupied = 0
+            for pos in positions:
+                occupied |= 1 << pos
+            for i, pos in enumerate(positions):
+                targets = ADJACENT[pos] & region
+                while targets:
+                    bit = targets & -targets
+                    targets ^= bit
+                    moved = positions[:i] + (bit.bit_length() - 1,) + positions[i + 1:]
+                    new_region = _blank_region(pos, occupied ^ (1 << pos) ^ bit)
+                    rep = new_region & -new_region
+                    rank = rank_positions(moved)
+                    if seen[rank] & rep:
+                        continue
+                    seen[rank] |= rep
+                    if table[rank] == 0xFF:
+                        table[rank] = distance
+                    next_frontier.append((moved, new_region))
+        frontier = next_frontier
+    return table
+
+def write_pattern_database(tiles, table, path):
+    """Write a table to ``path`` as a small header followed by raw bytes."""
+    with open(path, 'wb') as f:
+        f.write(MAGIC + struct.pack('B', len(tiles)) + bytes(tiles))
+        f.write(table)
+
+def database_path(directory, tiles):
+    """Return the file name used for the table of ``tiles``."""
+    return os.path.join(directory, 'pdb_' + '_'.join(map(str, tiles)) + '.bin')
+
+def build_partition(partition, directory):
+    """Build and save the tables of every group in a partition.
+
+    Args:
+        partition (str or sequence): A key of ``PARTITIONS`` or a sequence
+            of disjoint tile groups.
+        directory (str): Output directory; created if missing.
+
+    Raises:
+        ValueError: If a group has more than ``MAX_BUILD_TILES`` tiles.
+    """
+    groups = PARTITIONS.get(partition, partition)
+    if max(map(len, groups)) > MAX_BUILD_TILES:
+        raise ValueError(f"groups of more than {MAX_BUILD_TILES} tiles are too big to build")
+    os.makedirs(directory, exist_ok=True)
+    for tiles in groups:
+        path = database_path(directory, tiles)
+        print(f"Building {path} ({pattern_size(tiles)} entries)...")
+        write_pattern_database(tiles, build_pattern_database(tiles), path)
+
+class AdditivePatternDatabase(Heuristic):
+    """Sum of memory-mapped disjoint pattern databases.
+
+    The table files are mapped read-only, so every process that loads the
+    same directory shares one copy through the page cache. A move only
+    changes the entry of the group holding the moved tile, so ``update``
+    reads two entries of one table.
+
+    Args:
+        directory (str): Directory written by ``build_partition``.
+        partition (str or sequence): The partition the tables were built for.
+    """
+
+    name = 'pattern-database'
+
+    def __init__(self, directory, partition='6-6-3'):
+        self.groups = tuple(tuple(tiles) for tiles in PARTITIONS.get(partition, partition))
+        self._group_of = {tile: i for i, tiles in enumerate(self.groups) for tile in tiles}
+        self._files = []
+        self._tables = []
+        for tiles in self.groups:
+            f = open(database_path(directory, tiles), 'rb')
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header = len(MAGIC) + 1 + len(tiles)
+            if mapped[:len(MAGIC)] != MAGIC or tuple(mapped[len(MAGIC) + 1:header]) != tiles:
+                raise ValueError(f"{f.name} is not a pattern database for tiles {tiles}")
+            self._files.append((f, mapped))
+            self._tables.append(memoryview(mapped)[header:])
+
+    @staticmethod
+    def _positions(packed):
+        positions = [0] * 16
+        for i in range(16):
+            positions[(packed >> (4 * i)) & 0xF] = i
+        return positions
+
+    def evaluate(self, packed):
+        positions = self._positions(packed)
+        total = 0
+        for tiles, table in zip(self.groups, self._tables):
+            total += table[rank_positions([positions[tile] for tile in tiles])]
+        return total
+
+    def update(self, packed, h, tile, src, dst):
+        group = self._group_of.get(tile)
+        if group is None:
+            return h
+        tiles, table = self.groups[group], self._tables[group]
+        positions = self._positions(packed)
+        child = [positions[t] for t in tiles]
+        parent = [src if t == tile else positions[t] for t in tiles]
+        return h + table[rank_positions(child)] - table[rank_positions(parent)]
+
+    def close(self):
+        """Release the memory maps and their files."""
+        for table in self._tables:
+            table.release()
+        for f, mapped in self._files:
+            mapped.close()
+            f.close()
+        self._tables, self._files = [], []
+
+def main():
+    parser = argparse.ArgumentParser(description="Build 15-puzzle pattern databases.")
+    parser.add_argument('directory', help="output directory for the table files")
+    parser.add_argument('--partition', default='6-6-3', choices=BUILDABLE_PARTITIONS)
+    args = parser.parse_args()
+    build_partition(args.partition, args.directory)
+
+if __name__ == "__main__":
+    main()
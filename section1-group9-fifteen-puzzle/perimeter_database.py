@@ -0,0 +1,169 @@
+import argparse
+import bisect
+import mmap
+import struct
+from array import array
+
+from fifteenpuzzle import GOAL, Heuristic, get_engine, get_heuristic
+
+MAGIC = b'PER1'
+# Magic, radius, three bytes of padding and the entry count, so the state
+# array that follows is 8-byte aligned for ``memoryview.cast('Q')``.
+HEADER = struct.Struct('<4sB3xQ')
+
+def build_perimeter(radius):
+    """Find every state within ``radius`` moves of ``GOAL``.
+
+    Runs a backward breadth-first search one layer at a time. Each move
+    changes the blank's row or column by one, so the board graph is
+    bipartite and a layer's neighbours lie only in the layers just above
+    and below it; only three layers are held at once.
+
+    Args:
+        radius (int): Largest distance to include.
+
+    Returns:
+        tuple: ``(states, distances)``, an ``array('Q')`` of packed states
+               in ascending order and a ``bytearray`` of their distances.
+    """
+    engine = get_engine(4)
+    layers = []
+    previous, layer = set(), {engine.packed_goal: GOAL.index(0)}
+    for distance in range(radius + 1):
+        layers.append(sorted(layer))
+        if distance == radius:
+            break
+        next_layer = {}
+        for state, blank in layer.items():
+            for neighbor, new_blank, _, _ in engine.neighbors(state, blank):
+                if neighbor not in previous and neighbor not in layer:
+                    next_layer[neighbor] = new_blank
+        previous, layer = set(layer), next_layer
+    entries = sorted((state, distance) for distance, states in enumerate(layers) for state in states)
+    return array('Q', [state for state, _ in entries]), bytearray(d for _, d in entries)
+
+def write_perimeter(path, radius, states, distances):
+    """Write a perimeter as a header, the sorted states and their distances."""
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, radius, len(states)))
+        f.write(states.tobytes())
+        f.write(distances)
+
+class PerimeterDatabase:
+    """Memory-mapped exact distances for every state near ``GOAL``.
+
+    States are found by binary search over the mapped sorted array, so
+    the file is shared through the page cache and never loaded whole.
+    Solvers take an instance as their ``perimeter`` argument: they stop
+    as soon as they reach a state inside the radius, and search with the
+    heuristic returned by ``wrap``.
+
+    Args:
+        path (str): File written by ``write_perimeter``.
+    """
+
+    size = 4
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.radius, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a perimeter database")
+        states_end = HEADER.size + 8 * count
+        self._states = memoryview(self._map)[HEADER.size:states_end].cast('Q')
+        self._distances = memoryview(self._map)[states_end:states_end + count]
+        self._engine = get_engine(4)
+
+    def __len__(self):
+        return len(self._states)
+
+    def distance(self, packed):
+        """Return the exact distance of ``packed`` to ``GOAL``, or ``None``
+        if it lies outside the radius."""
+        i = bisect.bisect_left(self._states, packed)
+        if i < len(self._states) and self._states[i] == packed:
+            return self._distances[i]
+        return None
+
+    def path(self, packed):
+        """Return the optimal moves from a state inside the radius to ``GOAL``."""
+        engine = self._engine
+        distance = self.distance(packed)
+        if distance is None:
+            raise KeyError("state is outside the perimeter")
+        blank = engine.blank_of(packed)
+        moves = []
+        while distance:
+            for neighbor, new_blank, move, _ in engine.neighbors(packed, blank):
+                if self.distance(neighbor) == distance - 1:
+                    break
+            moves.append(move)
+            packed, blank, distance = neighbor, new_blank, distance - 1
+        return moves
+
+    def wrap(self, heuristic=None):
+        """Return ``heuristic`` made exact inside the radius."""
+        if isinstance(heuristic, PerimeterHeuristic):
+            return heuristic
+        return PerimeterHeuristic(self, heuristic)
+
+    def close(self):
+        """Release the memory map and its file."""
+        self._states.release()
+        self._distances.release()
+        self._map.close()
+        self._file.close()
+
+class PerimeterHeuristic(Heuristic):
+    """A base heuristic made exact near the goal by a perimeter database.
+
+    Inside the radius the value is the stored distance. Outside it every
+    state is at least ``radius + 1`` away, so the value is
+    ``max(base, radius + 1)``. An admissible base never exceeds the true
+    distance, so the database is only searched when the base is at most
+    ``radius``; solvers can likewise tell that a state is inside the
+    perimeter, with an exact value, from ``h <= radius`` alone.
+
+    Args:
+        perimeter (PerimeterDatabase): Exact distances near the goal.
+        base: Heuristic for the rest, as accepted by ``get_heuristic``.
+    """
+
+    name = 'perimeter'
+
+    def __init__(self, perimeter, base=None):
+        self.perimeter = perimeter
+        self.radius = perimeter.radius
+        self.base = get_heuristic(base)
+
+    def _combine(self, packed, base):
+        if base > self.radius:
+            return base
+        distance = self.perimeter.distance(packed)
+        return self.radius + 1 if distance is None else distance
+
+    def evaluate(self, packed):
+        return self._combine(packed, self.base.evaluate(packed))
+
+    def update(self, packed, h, tile, src, dst):
+        # Above radius + 1 the parent's value is its base value, so the
+        # base can be updated incrementally; otherwise it is recomputed.
+        if h > self.radius + 1:
+            base = self.base.update(packed, h, tile, src, dst)
+        else:
+            base = self.base.evaluate(packed)
+        return self._combine(packed, base)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a 15-puzzle perimeter database.")
+    parser.add_argument('path', help="output file")
+    parser.add_argument('--radius', type=int, default=20,
+                        help="largest distance stored; each extra move roughly doubles the size")
+    args = parser.parse_args()
+    states, distances = build_perimeter(args.radius)
+    write_perimeter(args.path, args.radius, states, distances)
+    print(f"Wrote {len(states)} states within {args.radius} moves to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import sqlite3
+import time
+
+from fifteenpuzzle import get_engine
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    size INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    moves TEXT NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (size, state)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS positions_used ON positions (used);
+"""
+
+class SolutionCache:
+    """On-disk store of optimal solutions keyed by packed state.
+
+    Storing a solution records every state along it together with the
+    optimal moves remaining from there, so a later query for any of
+    those states, or a search that reaches one, is a single primary-key
+    lookup. Only optimal move sequences may be stored: every suffix of a
+    shortest path is itself a shortest path, which is what makes the
+    recorded remaining distances exact.
+
+    When the store grows past ``max_entries`` the least recently used
+    positions are evicted. Lookups mark their hits in memory and write
+    the timestamps back with the next ``add`` or on ``close``, so reads
+    never wait on a write.
+
+    Args:
+        path (str): SQLite database file; created if missing.
+        max_entries (int): Size cap in positions, or ``None`` for no cap.
+    """
+
+    def __init__(self, path, max_entries=1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript(SCHEMA)
+        self._count = self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        self._touched = set()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _key(packed, size):
+        engine = get_engine(size)
+        return packed.to_bytes((engine.bits * engine.cells + 7) // 8, 'little')
+
+    def lookup(self, packed, size=4):
+        """Return the optimal remaining moves from ``packed`` as a string.
+
+        Args:
+            packed (int): Packed puzzle state.
+            size (int): Board width.
+
+        Returns:
+            str: Moves such as ``'DRUL'`` (empty at the goal), or ``None``
+                 if the position is not stored.
+        """
+        key = self._key(packed, size)
+        row = self.connection.execute(
+            "SELECT moves FROM positions WHERE size = ? AND state = ?", (size, key)).fetchone()
+        if row is None:
+            return None
+        self._touched.add((size, key))
+        return row[0]
+
+    def distance(self, packed, size=4):
+        """Return the exact distance of ``packed`` to the goal, or ``None``."""
+        moves = self.lookup(packed, size)
+        return None if moves is None else len(moves)
+
+    def add(self, packed, moves, size=4):
+        """Record an optimal solution and every state along it.
+
+        Args:
+            packed (int): Packed start state.
+            moves (sequence): Optimal moves ('U','D','L','R') to the goal.
+            size (int): Board width.
+        """
+        engine = get_engine(size)
+        bits, mask = engine.bits, engine.mask
+        moves = ''.join(moves)
+        blank = engine.blank_of(packed)
+        now = time.time()
+        rows = []
+        for i, move in enumerate(moves):
+            rows.append((size, self._key(packed, size), moves[i:], now))
+            new_blank = dict((m, cell) for cell, m in engine.blank_moves[blank])[move]
+            tile = (packed >> (bits * new_blank)) & mask
+            packed ^= (tile << (bits * new_blank)) ^ (tile << (bits * blank))
+            blank = new_blank
+        rows.append((size, self._key(packed, size), '', now))
+        with self.connection:
+            self._flush_touched(now)
+            self.connection.executemany(
+                "INSERT INTO positions (size, state, moves, used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (size, state) DO UPDATE SET used = excluded.used", rows)
+            self._count += len(rows)
+            if self.max_entries is not None and self._count > self.max_entries:
+                self._evict()
+
+    def _flush_touched(self, now):
+        if self._touched:
+            self.connection.executemany(
+                "UPDATE positions SET used = ? WHERE size = ? AND state = ?",
+                [(now, size, key) for size, key in self._touched])
+            self._touched.clear()
+
+    def _evict(self):
+        # Trim to 90% of the cap so eviction runs once per many additions.
+        self._count = self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        excess = self._count - int(self.max_entries * 0.9)
+        if self._count > self.max_entries and excess > 0:
+            self.connection.execute(
+                "DELETE FROM positions WHERE (size, state) IN "
+                "(SELECT size, state FROM positions ORDER BY used LIMIT ?)", (excess,))
+            self._count -= excess
+
+    def close(self):
+        """Write back pending hit times and close the database."""
+        if self.connection is None:
+            return
+        with self.connection:
+            self._flush_touched(time.time())
+        self.connection.close()
+        self.connection = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a 15-puzzle solution cache.")
+    parser.add_argument('path', help="cache database file")
+    args = parser.parse_args()
+    with SolutionCache(args.path, max_entries=None) as cache:
+        print(f"{len(cache)} positions")
+        for size, count, longest in cache.connection.execute(
+                "SELECT size, COUNT(*), MAX(length(moves)) FROM positions GROUP BY size"):
+            print(f"  {size}x{size}: {count} positions, longest {longest} moves")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import argparse
+import json
+import multiprocessing
+import queue
+import signal
+import sys
+import time
+
+from batch_solve import SOLVERS
+from fifteenpuzzle import get_move_automaton, print_board, scramble_puzzle, watch_pygame
+
+# Seconds between progress events sent by a running solve.
+PROGRESS_INTERVAL = 0.1
+
+def _run(solver, start, kwargs, events, interval):
+    # Ctrl+C in the terminal reaches the whole process group; the parent
+    # decides whether it cancels the solve.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Built before the clock starts, as batch_solve's workers do.
+    get_move_automaton()
+    started = time.perf_counter()
+    next_report = started
+
+    def progress(nodes, bound, frontier):
+        nonlocal next_report
+        now = time.perf_counter()
+        if now >= next_report:
+            next_report = now + interval
+            events.put({'event': 'progress', 'nodes': nodes, 'bound': bound,
+                        'frontier': frontier, 'seconds': round(now - started, 3)})
+
+    try:
+        path, nodes, *bound = SOLVERS[solver](start, progress=progress, **kwargs)
+    except Exception as e:
+        events.put({'event': 'error', 'error': repr(e)})
+        return
+    record = {'event': 'done', 'path': path, 'nodes': nodes,
+              'seconds': round(time.perf_counter() - started, 3)}
+    if bound:
+        record['bound'] = bound[0]
+    events.put(record)
+
+class SolverRunner:
+    """Runs one solve in a worker process without blocking the caller.
+
+    The worker streams events through a queue, each a dict with an
+    ``event`` key:
+
+    - ``progress``: ``nodes`` expanded so far, the current f-``bound``
+      (the depth limit for ``dfs``), the ``frontier`` size (the current
+      depth for depth-first solvers) and ``seconds``; sent at most every
+      ``interval`` seconds.
+    - ``done``: the ``path`` (a move list, or ``None`` if there is no
+      solution), ``nodes`` and ``seconds``, plus ``bound`` for anytime
+      solvers.
+    - ``error``: the ``error`` raised in the worker, or how it exited.
+    - ``cancelled`` or ``timeout``: ``seconds`` until the solve was stopped.
+
+    Each of the last four ends the run and is kept as ``result``. Read
+    events with ``poll``, which suits an event loop, or by iterating the
+    runner. ``cancel`` terminates the worker, so even a search that never
+    checks a flag stops at once.
+
+    Args:
+        solver (str): Key of ``batch_solve.SOLVERS``.
+        start (tuple): Start puzzle state as an N*N-element tuple (0 is empty).
+        time_limit (float): Seconds before the solve is stopped with a
+            ``timeout`` event, or ``None`` for no limit.
+        interval (float): Seconds between progress events.
+        **kwargs: Passed on to the solver; they must be picklable, so give
+            heuristics by name.
+    """
+
+    def __init__(self, solver, start, time_limit=None, interval=PROGRESS_INTERVAL, **kwargs):
+        if solver not in SOLVERS:
+            raise ValueError(f"unknown solver {solver!r}; choose from {', '.join(sorted(SOLVERS))}")
+        # Spawned rather than forked, so a parent with a pygame window open is safe.
+        context = multiprocessing.get_context('spawn')
+        self._events = context.Queue()
+        self._process = context.Process(target=_run, daemon=True,
+                                        args=(solver, tuple(start), kwargs, self._events, interval))
+        self._started = time.perf_counter()
+        self._deadline = None if time_limit is None else self._started + time_limit
+        self.result = None
+        self._process.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+
+    def __iter__(self):
+        """Yield events as they arrive, up to and including the final one."""
+        while self.result is None:
+            yield from self.poll(0.1)
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def poll(self, timeout=0):
+        """Return the events that arrived since the last call.
+
+        Args:
+            timeout (float): Seconds to wait when no event is pending;
+                0 returns at once.
+
+        Returns:
+            list: Event dicts, oldest first; empty if there were none.
+        """
+        events = []
+        while self.result is None:
+            # Checked before reading, so a worker that exits just after
+            # sending its final event is not taken for a crash.
+            alive = self._process.is_alive()
+            wait = 0 if events else timeout
+            if self._deadline is not None:
+                wait = min(wait, max(0, self._deadline - time.perf_counter()))
+            try:
+                event = self._events.get(timeout=wait) if wait else self._events.get_nowait()
+            except queue.Empty:
+                if not alive:
+                    events.append(self._finish(
+                        {'event': 'error',
+                         'error': f"solver process exited with code {self._process.exitcode}"}))
+                elif self._deadline is not None and time.perf_counter() >= self._deadline:
+                    events.append(self._stop('timeout'))
+                break
+            if event['event'] != 'progress':
+                self._finish(event)
+            events.append(event)
+        return events
+
+    def cancel(self):
+        """Stop the solve if it is still running; the result is ``cancelled``."""
+        if self.result is None:
+            self._stop('cancelled')
+
+    def _stop(self, reason):
+        self._process.terminate()
+        return self._finish({'event': reason,
+                             'seconds': round(time.perf_counter() - self._started, 3)})
+
+    def _finish(self, event):
+        self.result = event
+        self._process.join()
+        self._events.close()
+        return event
+
+def describe_result(result):
+    """Return a one-line summary of a final event that is not a solution."""
+    if result['event'] == 'done':
+        return f"No solution ({result['nodes']} nodes explored)"
+    if result['event'] == 'error':
+        return f"Error: {result['error']}"
+    reason = 'timed out' if result['event'] == 'timeout' else result['event']
+    return f"Search {reason} after {result['seconds']:.1f} s"
+
+def print_progress(runner, out=sys.stderr):
+    """Show a runner's progress on one terminal line until it finishes.
+
+    Ctrl+C cancels the solve instead of interrupting the caller.
+
+    Returns:
+        dict: The runner's final event.
+    """
+    try:
+        for event in runner:
+            if event['event'] == 'progress':
+                out.write(f"\r{event['nodes']} nodes, bound {event['bound']}, "
+                          f"frontier {event['frontier']}, {event['seconds']:.1f} s ")
+                out.flush()
+    except KeyboardInterrupt:
+        runner.cancel()
+    out.write('\n')
+    return runner.result
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve one 15-puzzle instance in the background.")
+    parser.add_argument('state', nargs='?', default=None,
+                        help="JSON array of tiles; a 50-move scramble if omitted")
+    parser.add_argument('--solver', default='idastar', choices=sorted(SOLVERS))
+    parser.add_argument('--heuristic', default=None, help="heuristic name, e.g. linear-conflict")
+    parser.add_argument('--time-limit', type=float, default=None, help="seconds before giving up")
+    parser.add_argument('--window', action='store_true',
+                        help="show the search and the solution in a pygame window")
+    args = parser.parse_args()
+
+    state = tuple(json.loads(args.state)) if args.state else scramble_puzzle(50)
+    print_board(state)
+    kwargs = {} if args.heuristic is None else {'heuristic': args.heuristic}
+    with SolverRunner(args.solver, state, args.time_limit, **kwargs) as runner:
+        if args.window:
+            result = watch_pygame(state, runner, args.solver)
+        else:
+            result = print_progress(runner)
+    if result['event'] != 'done' or result['path'] is None:
+        print(describe_result(result))
+    else:
+        print(f"{len(result['path'])} moves: {''.join(result['path'])}")
+        print(f"{result['nodes']} nodes in {result['seconds']:.2f} s")
+
+if __name__ == "__main__":
+    main()